@@ -0,0 +1,58 @@
+import collections
+from typing import Iterable, Iterator, Sequence
+
+# Aho-Corasick automaton: finds all occurrences of many patterns in a single
+# pass over a text, in time proportional to the length of the text plus the
+# number of occurrences, independent of the number of patterns.
+
+
+class Automaton:
+    def __init__(self, patterns: Sequence[str]):
+        if any(not pattern for pattern in patterns):
+            raise ValueError("Patterns must not be empty")
+        self.patterns = list(patterns)
+        # A trie of the patterns, state 0 is the root
+        self.transitions: list[dict[str, int]] = [{}]
+        # The state of the longest proper suffix of a state's string that is
+        # in the trie, followed when a character has no transition
+        self.fail = [0]
+        # Indexes of the patterns that end in a state, including through
+        # its fail links
+        self.outputs: list[list[int]] = [[]]
+        for idx, pattern in enumerate(self.patterns):
+            state = 0
+            for c in pattern:
+                next_ = self.transitions[state].get(c)
+                if next_ is None:
+                    next_ = len(self.transitions)
+                    self.transitions[state][c] = next_
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                state = next_
+            self.outputs[state].append(idx)
+        # Breadth first, so the fail links of shorter strings are known
+        queue = collections.deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, next_ in self.transitions[state].items():
+                queue.append(next_)
+                fail = self.fail[state]
+                while fail and c not in self.transitions[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_] = self.transitions[fail].get(c, 0)
+                self.outputs[next_] = (
+                    self.outputs[next_] + self.outputs[self.fail[next_]]
+                )
+
+    def search(self, text: Iterable[str]) -> Iterator[tuple[int, int]]:
+        # (index of the last character, pattern index) of every occurrence of
+        # the patterns in text, overlapping ones included
+        transitions, fail, outputs = self.transitions, self.fail, self.outputs
+        state = 0
+        for idx, c in enumerate(text):
+            while state and c not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(c, 0)
+            for pattern in outputs[state]:
+                yield idx, pattern
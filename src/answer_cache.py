@@ -0,0 +1,128 @@
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+import types
+from pathlib import Path
+from typing import Any, Callable
+
+import input_stream
+import parse_cache
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".answer-cache"
+
+# Total size of the cached answers in bytes. The least recently used ones are
+# removed beyond that.
+MAX_SIZE = 1 << 20
+
+
+class AnswerCache:
+    # Answers of one day for one input file, keyed by (day, part, input hash,
+    # source hash). The source hash covers the day module and the local modules
+    # it uses (see parse_cache.source_hash). Without a cache directory nothing
+    # is cached.
+    def __init__(
+        self,
+        cache_dir: os.PathLike | None,
+        day: int,
+        module: types.ModuleType,
+        input_file: os.PathLike,
+        max_size: int = MAX_SIZE,
+    ):
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        self.day = day
+        self.max_size = max_size
+        if self.cache_dir is not None:
+            self.source_hash = parse_cache.source_hash(module)
+            self.input_hash = parse_cache.file_hash(input_file)
+
+    def path(self, part: int) -> Path:
+        name = f"day-{self.day:02}-part-{part}-{self.source_hash}-{self.input_hash}"
+        return self.cache_dir / f"{name}.json"
+
+    def get(self, parts: tuple[int, ...]) -> dict[int, Any] | None:
+        # Answers of all the parts, or None if any of them isn't cached
+        if self.cache_dir is None:
+            return None
+        answers = {}
+        for part in parts:
+            path = self.path(part)
+            try:
+                with open(path, "r") as f:
+                    answers[part] = json.load(f)
+                # The modification time tells when an answer was last used
+                os.utime(path)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return None
+        return answers
+
+    def put(self, answers: dict[int, Any]) -> None:
+        if self.cache_dir is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for part, answer in answers.items():
+            # Write to a temporary file first, readers never see partial files
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(answer, f)
+            os.replace(tmp_path, self.path(part))
+        evict(self.cache_dir, self.max_size)
+
+    def get_or_compute(self, part: int, compute: Callable[[], Any]) -> Any:
+        return self.get_or_compute_all((part,), lambda: (compute(),))[0]
+
+    def get_or_compute_all(
+        self, parts: tuple[int, ...], compute: Callable[[], tuple]
+    ) -> tuple:
+        # For solutions that compute several parts at once
+        answers = self.get(parts)
+        if answers is None:
+            answers = dict(zip(parts, compute()))
+            self.put(answers)
+        return tuple(answers[part] for part in parts)
+
+
+def lazy(func: Callable[..., Any], *args: Any) -> Callable[[], Any]:
+    # func(*args), computed on the first call and kept. The CLIs parse their
+    # input this way, so inputs whose answers are all cached aren't parsed.
+    return functools.cache(functools.partial(func, *args))
+
+
+def evict(cache_dir: os.PathLike, max_size: int) -> None:
+    # Removes the least recently used answers until the rest fits in max_size
+    entries = []
+    for path in Path(cache_dir).glob("*.json"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            # Removed by another process in the meantime
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+        path.unlink(missing_ok=True)
+        total_size -= size
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    # Recompute the answers, e.g. to measure the solutions
+    parser.add_argument("--no-answer-cache", action="store_true")
+    parser.add_argument("--answer-cache", type=str, default=CACHE_DIR)
+    parser.add_argument("--answer-cache-size", type=int, default=MAX_SIZE)
+
+
+def from_args(args: argparse.Namespace, day: int) -> AnswerCache:
+    # Cache for a day's CLI, configured by the arguments from add_arguments
+    cache_dir = args.answer_cache
+    # Streamed inputs can only be read once, they can't be hashed beforehand
+    if args.no_answer_cache or input_stream.is_stream(args.input):
+        cache_dir = None
+    # Cached answers would leave nothing to profile (see profiling.py)
+    if args.profile is not None:
+        cache_dir = None
+    module = sys.modules["__main__"]
+    return AnswerCache(cache_dir, day, module, args.input, args.answer_cache_size)
@@ -0,0 +1,76 @@
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Iterable, TextIO
+
+import runner
+import solutions
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    # Solve every file in a directory instead of --input
+    parser.add_argument("--input-dir", type=str, default=None)
+    parser.add_argument("--jobs", type=int, default=None)
+    # JSONL file with one result per input file, stdout by default
+    parser.add_argument("--output", type=str, default=None)
+
+
+def input_files(input_dir: os.PathLike) -> list[Path]:
+    # Hidden files are left out
+    return sorted(
+        path
+        for path in Path(input_dir).iterdir()
+        if path.is_file() and not path.name.startswith(".")
+    )
+
+
+def solve_file(day: int, input_file: os.PathLike) -> dict:
+    # Runs in a worker process. The day module is only imported once per
+    # worker, so tables it keeps at module level are reused for later files.
+    try:
+        result = runner.run_day(day, input_file)
+    except Exception as e:
+        # One broken input shouldn't stop the whole batch
+        return {"file": str(input_file), "error": f"{type(e).__name__}: {e}"}
+    return {
+        "file": str(input_file),
+        "answers": result["answers"],
+        "timings": result["timings"],
+    }
+
+
+def run_batch(
+    day: int, files: Iterable[os.PathLike], jobs: int | None, output: TextIO
+) -> None:
+    # Results are written in the order of the files. Only a few files per
+    # worker are queued at a time, so large directories are streamed.
+    window = 4 * (jobs or os.cpu_count() or 1)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=solutions.load, initargs=(day,)
+    ) as executor:
+        pending = collections.deque()
+        for input_file in files:
+            pending.append(executor.submit(solve_file, day, input_file))
+            if len(pending) >= window:
+                write_result(pending.popleft().result(), output)
+        while pending:
+            write_result(pending.popleft().result(), output)
+
+
+def write_result(result: dict, output: TextIO) -> None:
+    output.write(json.dumps(result) + "\n")
+    output.flush()
+
+
+def run(args: argparse.Namespace, day: int) -> None:
+    # Batch mode of a day's CLI, configured by the arguments from add_arguments
+    files = input_files(args.input_dir)
+    if args.output is None:
+        run_batch(day, files, args.jobs, sys.stdout)
+    else:
+        with open(args.output, "w") as f:
+            run_batch(day, files, args.jobs, f)
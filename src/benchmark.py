@@ -0,0 +1,217 @@
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+from pathlib import Path
+
+import generators
+import runner
+import solutions
+
+BASELINE_FILE = runner.SRC_DIR.parent / ".benchmark-baseline.json"
+GENERATED_DIR = runner.SRC_DIR.parent / ".benchmark-inputs"
+
+# Sizes of the generated inputs per day (see generators.py for what the size
+# means for each day). Grid days use square grids.
+SCALED_SIZES = {
+    1: [100000],
+    2: [100000],
+    3: [1000000],
+    4: [500],
+    5: [10000],
+    6: [160],
+    7: [1000],
+    8: [200],
+    9: [100001],
+    10: [500],
+    11: [2000],
+    12: [500],
+    13: [100000],
+    14: [1000],
+    15: [100],
+    16: [300],
+    17: [32],
+    18: [5000],
+    19: [2000],
+    20: [151],
+    21: [1000],
+    22: [3000],
+    23: [2000],
+    24: [200],
+    25: [2000],
+}
+
+
+def generated_input(day: int, size: int, seed: int, generated_dir: os.PathLike) -> Path:
+    path = Path(generated_dir) / f"input-{day:02}-{size}-{seed}.txt"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so an interrupted run doesn't
+        # leave a truncated input behind
+        tmp_path = path.with_suffix(".tmp")
+        generators.write_input(generators.generate(day, size, seed=seed), tmp_path)
+        tmp_path.rename(path)
+    return path
+
+
+def percentile(samples: list[float], p: float) -> float:
+    # Nearest-rank percentile
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(day: int, input_file: os.PathLike, repeat: int) -> dict[str, dict]:
+    # Parse and solve from scratch in every repetition, since some solvers
+    # modify the parsed input. Tables kept at module level by earlier
+    # repetitions are cleared, so every repetition pays for them.
+    samples = {}
+    for _ in range(repeat):
+        solutions.clear_tables(day)
+        result = runner.run_day(day, input_file)
+        for step, seconds in result["timings"].items():
+            if seconds is not None:
+                samples.setdefault(step, []).append(seconds)
+    return {
+        step: {
+            "median": statistics.median(times),
+            "p95": percentile(times, 95),
+            "samples": len(times),
+        }
+        for step, times in samples.items()
+    }
+
+
+def count(day: int, input_file: os.PathLike) -> dict[str, dict[str, int]]:
+    # Counters of the solutions (see counters.py) per step, from a separate
+    # run, since counting slows the counted functions down
+    return runner.run_day(day, input_file, count=True)["counters"]
+
+
+def benchmark_inputs(
+    days: list[int], inputs: str, seed: int, data_dir: os.PathLike
+) -> list[tuple[int, str, Path]]:
+    benchmarks = []
+    for day in days:
+        if inputs in ("data", "all"):
+            path = runner.input_path(day, data_dir)
+            benchmarks.append((day, "data", path))
+        if inputs in ("scaled", "all"):
+            for size in SCALED_SIZES[day]:
+                path = generated_input(day, size, seed, GENERATED_DIR)
+                benchmarks.append((day, f"scaled-{size}", path))
+    return benchmarks
+
+
+def find_regressions(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    threshold: float,
+    min_time: float,
+) -> list[str]:
+    regressions = []
+    for key, stats in results.items():
+        if key not in baseline:
+            continue
+        base_median = baseline[key]["median"]
+        # Differences in very short measurements are mostly noise
+        if base_median < min_time:
+            continue
+        if stats["median"] > base_median * (1 + threshold):
+            regressions.append(key)
+    return regressions
+
+
+def format_change(stats: dict, base: dict | None) -> str:
+    if base is None or base["median"] == 0:
+        return "new"
+    change = stats["median"] / base["median"] - 1
+    return f"{change:+.1%}"
+
+
+def print_results(
+    results: dict[str, dict], baseline: dict[str, dict], regressions: list[str]
+) -> None:
+    print(f"{'Benchmark':<32}  {'Median':>12}  {'p95':>12}  {'Change':>8}")
+    for key, stats in results.items():
+        marker = "  REGRESSION" if key in regressions else ""
+        print(
+            f"{key:<32}  {runner.format_ms(stats['median']):>12}"
+            f"  {runner.format_ms(stats['p95']):>12}"
+            f"  {format_change(stats, baseline.get(key)):>8}{marker}"
+        )
+
+
+def print_counters(results: dict[str, dict], baseline: dict[str, dict]) -> None:
+    # Counts are exact, any change means the solution did different work
+    print()
+    print(f"{'Benchmark':<32}  {'Count':>12}  {'Change':>8}  Counter")
+    for key, stats in results.items():
+        base_counts = baseline.get(key, {}).get("counters", {})
+        for counter, value in stats.get("counters", {}).items():
+            base = base_counts.get(counter)
+            change = "new" if not base else f"{value / base - 1:+.1%}"
+            print(f"{key:<32}  {value:>12}  {change:>8}  {counter}")
+
+
+def read_baseline(baseline_file: os.PathLike) -> dict[str, dict]:
+    try:
+        with open(baseline_file, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_baseline(baseline_file: os.PathLike, results: dict[str, dict]) -> None:
+    # Keep the measurements of benchmarks that didn't run this time
+    baseline = read_baseline(baseline_file) | results
+    with open(baseline_file, "w") as f:
+        json.dump(dict(sorted(baseline.items())), f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, nargs="+", default=list(runner.DAYS))
+    parser.add_argument("--data-dir", type=str, default=runner.DATA_DIR)
+    parser.add_argument("--inputs", choices=("data", "scaled", "all"), default="all")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=str, default=BASELINE_FILE)
+    # Store the results as the new baseline instead of comparing against it
+    parser.add_argument("--update-baseline", action="store_true")
+    # Allowed slowdown of the median, relative to the baseline
+    parser.add_argument("--threshold", type=float, default=0.2)
+    # Baseline medians below this many seconds are not checked
+    parser.add_argument("--min-time", type=float, default=0.001)
+    # Also report the counters of the solutions
+    parser.add_argument("--counters", action="store_true")
+    args = parser.parse_args()
+    results = {}
+    for day, input_name, path in benchmark_inputs(
+        args.days, args.inputs, args.seed, args.data_dir
+    ):
+        for step, stats in measure(day, path, args.repeat).items():
+            results[f"day-{day:02}/{input_name}/{step}"] = stats
+        if args.counters:
+            for step, counts in count(day, path).items():
+                key = f"day-{day:02}/{input_name}/{step}"
+                if counts and key in results:
+                    results[key]["counters"] = counts
+    baseline = read_baseline(args.baseline)
+    if args.update_baseline:
+        print_results(results, baseline, [])
+        if args.counters:
+            print_counters(results, baseline)
+        write_baseline(args.baseline, results)
+        sys.exit(0)
+    regressions = find_regressions(results, baseline, args.threshold, args.min_time)
+    print_results(results, baseline, regressions)
+    if args.counters:
+        print_counters(results, baseline)
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}"
+        )
+        sys.exit(1)
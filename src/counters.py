@@ -0,0 +1,127 @@
+import collections
+import collections.abc
+import contextlib
+import functools
+import sys
+from typing import Any, Callable, Iterator
+
+# Counts of what the solutions do, e.g. nodes popped by a search or cache hits.
+# Counting is off by default and costs nothing then: functions are only marked
+# with @counted, and counting versions replace them during a session.
+
+# (function name, counter name, whether only true results count) of the
+# functions marked with @counted, per module
+COUNTED_FUNCTIONS: dict[str, list[tuple[str, str, bool]]] = {}
+
+# The counts of the running session, None if counting is off
+_counts: collections.Counter | None = None
+
+
+def counted(counter: str, only_true: bool = False) -> Callable:
+    # Marks a function whose calls are counted during a session, or only the
+    # calls that return a true value. The function itself is returned
+    # unchanged.
+    def mark(func: Callable) -> Callable:
+        marked = COUNTED_FUNCTIONS.setdefault(func.__module__, [])
+        marked.append((func.__name__, counter, only_true))
+        return func
+
+    return mark
+
+
+def enabled() -> bool:
+    return _counts is not None
+
+
+def add(counter: str, count: int = 1) -> None:
+    # For counts outside of hot loops, e.g. once per search
+    if _counts is not None:
+        _counts[counter] += count
+
+
+def _counting(func: Callable, counter: str, only_true: bool) -> Callable:
+    counts = _counts
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        if result or not only_true:
+            counts[counter] += 1
+        return result
+
+    return wrapper
+
+
+def calls(func: Callable, counter: str) -> Callable:
+    # func, counting its calls during a session. For functions that aren't
+    # module globals, e.g. callbacks; called once per use, not in hot loops.
+    if _counts is None:
+        return func
+    return _counting(func, counter, False)
+
+
+class _CountingCache(collections.abc.MutableMapping):
+    # Counts the membership tests on a cache dict as hits and misses. Writes
+    # go to the dict, so it stays usable after the session.
+    def __init__(self, data: dict, counter: str, counts: collections.Counter):
+        self.data = data
+        self.hits = f"{counter} hits"
+        self.misses = f"{counter} misses"
+        self.counts = counts
+
+    def __contains__(self, key: Any) -> bool:
+        found = key in self.data
+        self.counts[self.hits if found else self.misses] += 1
+        return found
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.data[key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.data[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        del self.data[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+def cache(counter: str, data: dict | None = None) -> dict | _CountingCache:
+    # A cache dict (data or a new one), counting hits and misses of `in` tests
+    # during a session
+    if data is None:
+        data = {}
+    if _counts is None:
+        return data
+    return _CountingCache(data, counter, _counts)
+
+
+@contextlib.contextmanager
+def session() -> Iterator[collections.Counter]:
+    # Counts everything within the with statement. The marked functions of all
+    # loaded modules are replaced in their module namespace, so calls from the
+    # rest of the module (including recursive calls) are counted, and restored
+    # afterwards.
+    global _counts
+    if _counts is not None:
+        raise RuntimeError("Counting is already on")
+    _counts = collections.Counter()
+    replaced = []
+    try:
+        for module_name, marked in COUNTED_FUNCTIONS.items():
+            module = sys.modules.get(module_name)
+            if module is None:
+                continue
+            for name, counter, only_true in marked:
+                func = getattr(module, name)
+                replaced.append((module, name, func))
+                setattr(module, name, _counting(func, counter, only_true))
+        yield _counts
+    finally:
+        for module, name, func in reversed(replaced):
+            setattr(module, name, func)
+        _counts = None
@@ -0,0 +1,223 @@
+import argparse
+import collections
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from pathlib import Path
+
+import parse_cache
+import runner
+import solutions
+
+SOCKET_PATH = runner.SRC_DIR.parent / ".daemon.sock"
+
+# Requests and responses are JSON objects, one per line:
+#   {"day": 6, "parts": [1, 2], "input": "/abs/path/input-06.txt"}
+#   (all parts of the day if "parts" is left out)
+#   -> {"day": 6, "answers": {"1": ..., "2": ...}, "timings": {...}}
+#   {"command": "ping"} / {"command": "shutdown"} -> {"status": ...}
+# Failed requests get {"error": "..."}.
+
+
+class Entry:
+    # Parsed input of one day and input file. The lock serializes the solves
+    # on the state, since some solvers modify it temporarily.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.mtime_ns = None
+        self.size = None
+        self.hash = None
+        self.state = None
+
+    def refresh(self, day: int, input_file: Path) -> float | None:
+        # Reparses the input if the file changed, returns the parse time or
+        # None if the parsed state was still current
+        stat = os.stat(input_file)
+        if self.hash is not None and (stat.st_mtime_ns, stat.st_size) == (
+            self.mtime_ns,
+            self.size,
+        ):
+            return None
+        digest = parse_cache.file_hash(input_file)
+        self.mtime_ns, self.size = stat.st_mtime_ns, stat.st_size
+        # Touched, but the same contents
+        if digest == self.hash:
+            return None
+        self.hash = None
+        self.state, parse_time = runner.timed(runner.parse, day, input_file)
+        self.hash = digest
+        return parse_time
+
+
+class StateCache:
+    # The most recently used parsed inputs
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def entry(self, day: int, input_file: Path) -> Entry:
+        key = (day, input_file)
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = Entry()
+            self.entries.move_to_end(key)
+            # Requests still using an evicted entry keep their reference
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            return self.entries[key]
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                response = self.server.respond(json.loads(line))
+            except json.JSONDecodeError as e:
+                response = {"error": f"Invalid request: {e}"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class SolverServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(
+        self, socket_path: os.PathLike, jobs: int, max_pending: int, max_entries: int
+    ):
+        super().__init__(str(socket_path), Handler)
+        self.cache = StateCache(max_entries)
+        # At most `jobs` solves run at a time, at most `max_pending` requests
+        # run or wait for a slot, later ones are rejected
+        self.slots = threading.BoundedSemaphore(jobs)
+        self.max_pending = max_pending
+        self.pending = 0
+        self.pending_lock = threading.Lock()
+        self.load_lock = threading.Lock()
+
+    def respond(self, request: dict) -> dict:
+        match request.get("command", "solve"):
+            case "ping":
+                return {"status": "ok"}
+            case "shutdown":
+                # shutdown() waits for serve_forever(), which waits for this
+                # request, so it can't be called from this thread
+                threading.Thread(target=self.shutdown).start()
+                return {"status": "stopping"}
+            case "solve":
+                pass
+            case command:
+                return {"error": f"Unknown command: {command}"}
+        with self.pending_lock:
+            if self.pending >= self.max_pending:
+                return {"error": "Too many pending requests"}
+            self.pending += 1
+        try:
+            with self.slots:
+                return self.solve(
+                    request["day"], request.get("parts"), request["input"]
+                )
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            with self.pending_lock:
+                self.pending -= 1
+
+    def solve(self, day: int, parts: list[int] | None, input_file: str) -> dict:
+        if day not in runner.SOLVERS:
+            raise ValueError(f"No solution for day {day}")
+        solver = runner.SOLVERS[day]
+        available = (1, 2) if solver.combined or solver.part2 is not None else (1,)
+        if parts is None:
+            parts = available
+        if not set(parts) <= set(available):
+            raise ValueError(f"Day {day} has no part(s) {parts}")
+        with self.load_lock:
+            module = solutions.load(day)
+        entry = self.cache.entry(day, Path(input_file).resolve())
+        answers = {}
+        with entry.lock:
+            timings = {"parse": entry.refresh(day, Path(input_file))}
+            if solver.combined:
+                both, timings["part1"] = runner.timed(solver.part1, module, entry.state)
+                answers = {part: both[part - 1] for part in sorted(parts)}
+            else:
+                for part in sorted(parts):
+                    func = solver.part1 if part == 1 else solver.part2
+                    answers[part], timings[f"part{part}"] = runner.timed(
+                        func, module, entry.state
+                    )
+        return {"day": day, "answers": answers, "timings": timings}
+
+
+def send(socket_path: os.PathLike, request: dict) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def remove_stale_socket(socket_path: os.PathLike) -> None:
+    if not os.path.exists(socket_path):
+        return
+    try:
+        send(socket_path, {"command": "ping"})
+    except ConnectionRefusedError:
+        # Left behind by a daemon that didn't shut down cleanly
+        os.unlink(socket_path)
+        return
+    sys.exit(f"A daemon is already listening on {socket_path}")
+
+
+def serve(
+    socket_path: os.PathLike, jobs: int, max_pending: int, max_entries: int
+) -> None:
+    remove_stale_socket(socket_path)
+    try:
+        with SolverServer(socket_path, jobs, max_pending, max_entries) as server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--socket", type=str, default=SOCKET_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve")
+    # Solves running at the same time
+    serve_parser.add_argument("--jobs", type=int, default=2)
+    # Requests running or waiting, later ones are rejected
+    serve_parser.add_argument("--max-pending", type=int, default=16)
+    # Parsed inputs kept in memory
+    serve_parser.add_argument("--max-entries", type=int, default=64)
+    solve_parser = commands.add_parser("solve")
+    solve_parser.add_argument("--day", type=int, required=True)
+    solve_parser.add_argument("--part", type=int, choices=(1, 2), default=None)
+    solve_parser.add_argument("--input", type=str, default=None)
+    commands.add_parser("stop")
+    args = parser.parse_args()
+    if args.command != "serve" and not os.path.exists(args.socket):
+        sys.exit(f"No daemon is listening on {args.socket}")
+    match args.command:
+        case "serve":
+            serve(args.socket, args.jobs, args.max_pending, args.max_entries)
+        case "solve":
+            input_file = args.input or runner.input_path(args.day)
+            # The daemon might run in another directory
+            request = {"day": args.day, "input": str(Path(input_file).resolve())}
+            if args.part is not None:
+                request["parts"] = [args.part]
+            response = send(args.socket, request)
+            if "error" in response:
+                sys.exit(response["error"])
+            for part, answer in response["answers"].items():
+                print(f"Day {args.day}, Part {part}: {answer}")
+        case "stop":
+            send(args.socket, {"command": "shutdown"})
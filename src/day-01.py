@@ -1,36 +1,254 @@
 import argparse
+import heapq
+import itertools
 import os
+import tempfile
+from array import array
 from collections import Counter
+from typing import Iterator
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-def read_input(input_file: os.PathLike) -> tuple[int, int]:
-    left = []
-    right = []
-    with open(input_file, "r") as f:
-        for line in f:
-            numbers = line.split()
-            left.append(int(numbers[0]))
-            right.append(int(numbers[1]))
-    return left, right
+import answer_cache
+import batch
+import input_stream
+import int_reader
+import profiling
 
+# Inputs with at least this many pairs are solved with NumPy, if available.
+# Below that, the overhead of the array operations outweighs the gain.
+VECTORIZE_THRESHOLD = 1000
 
-def total_distance(left: list, right: list) -> int:
+INT64_LIMIT = 2**63
+
+# Out-of-core mode (--max-memory MiB): memory per byte of an input chunk while
+# its numbers are parsed, sorted and written, and per distinct ID counted for
+# part 2
+MEMORY_PER_INPUT_BYTE = 32
+COUNT_ENTRY_SIZE = 128
+MIN_CHUNK_SIZE = 1 << 12
+
+# Runs merged at once, more runs are merged in several passes. Each of them
+# has a read buffer, its values are Python ints while they're merged.
+MAX_MERGE_RUNS = 64
+RUN_BUFFER_OVERHEAD = 5
+MIN_RUN_BUFFER_SIZE = 1 << 12
+INT64_SIZE = 8
+
+# A column of location IDs, an int64 array for large inputs
+type Column = list[int] | np.ndarray
+
+
+def read_input(input_file: os.PathLike) -> tuple[Column, Column]:
+    # Large inputs are kept as int64 arrays and solved with NumPy
+    numbers = int_reader.read_int_array(input_file)
+    if np is None or len(numbers) < 2 * VECTORIZE_THRESHOLD:
+        numbers = numbers.tolist()
+        return numbers[0::2], numbers[1::2]
+    return np.ascontiguousarray(numbers[0::2]), np.ascontiguousarray(numbers[1::2])
+
+
+def total_distance(left: Column, right: Column) -> int:
+    if np is not None and isinstance(left, np.ndarray):
+        return total_distance_numpy(left, right)
     left.sort()
     right.sort()
     total_distance = sum(abs(l - r) for l, r in zip(left, right))
     return total_distance
 
 
-def similarity_score(left: list, right: list) -> int:
+def similarity_score(left: Column, right: Column) -> int:
+    if np is not None and isinstance(left, np.ndarray):
+        return similarity_score_numpy(left, right)
     right_counts = Counter(right)
     similarity_score = sum(right_counts[l] * l for l in left)
     return similarity_score
 
 
+def total_distance_numpy(left: "np.ndarray", right: "np.ndarray") -> int:
+    distances = np.abs(np.sort(left) - np.sort(right))
+    return exact_sum(distances, distances.max(initial=0))
+
+
+def similarity_score_numpy(left: "np.ndarray", right: "np.ndarray") -> int:
+    # Join the left numbers with the counts of the distinct right numbers
+    values, counts = np.unique(right, return_counts=True)
+    idx = np.searchsorted(values, left)
+    # Numbers larger than all right numbers have no match
+    idx[idx == len(values)] = 0
+    found = values[idx] == left
+    matched, matched_counts = left[found], counts[idx[found]]
+    bound = int(np.abs(matched).max(initial=0)) * int(matched_counts.max(initial=0))
+    if bound >= INT64_LIMIT:
+        return sum(l * c for l, c in zip(matched.tolist(), matched_counts.tolist()))
+    return exact_sum(matched * matched_counts, bound)
+
+
+def exact_sum(values: "np.ndarray", max_abs: int) -> int:
+    # Sums in int64 when the total can't overflow, with Python ints otherwise
+    if int(max_abs) * len(values) < INT64_LIMIT:
+        return int(values.sum())
+    return sum(values.tolist())
+
+
+def solve_out_of_core(input_file: os.PathLike, max_memory: int) -> tuple[int, int]:
+    # Both answers for inputs that don't fit into memory, using about
+    # max_memory bytes. The input is read once, in chunks: the sorted chunks
+    # of each column are written to temporary files (runs) and merged for
+    # part 1, part 2 counts the distinct IDs of both columns on the way.
+    chunk_size = max(MIN_CHUNK_SIZE, max_memory // MEMORY_PER_INPUT_BYTE)
+    max_count_entries = max_memory // (2 * COUNT_ENTRY_SIZE)
+    with tempfile.TemporaryDirectory(prefix="day-01-") as directory:
+        left_runs, right_runs = [], []
+        left_counts, right_counts = Counter(), Counter()
+        for numbers in int_reader.read_int_chunks(input_file, chunk_size):
+            left, right = numbers[0::2], numbers[1::2]
+            left_runs.append(write_run(left, directory))
+            right_runs.append(write_run(right, directory))
+            if left_counts is not None:
+                count_ids(left_counts, left)
+                count_ids(right_counts, right)
+                if len(left_counts) + len(right_counts) > max_count_entries:
+                    # Too many distinct IDs, part 2 joins the merged runs
+                    left_counts = right_counts = None
+        # Both columns are merged at the same time
+        buffer_size = run_buffer_size(max_memory // 2)
+        left_runs = reduce_runs(left_runs, directory, buffer_size)
+        right_runs = reduce_runs(right_runs, directory, buffer_size)
+        distance = sum(
+            abs(l - r)
+            for l, r in zip(
+                merge_runs(left_runs, buffer_size), merge_runs(right_runs, buffer_size)
+            )
+        )
+        if left_counts is not None:
+            if len(right_counts) < len(left_counts):
+                left_counts, right_counts = right_counts, left_counts
+            score = sum(
+                id_ * count * right_counts[id_] for id_, count in left_counts.items()
+            )
+        else:
+            score = similarity_score_sorted(
+                merge_runs(left_runs, buffer_size), merge_runs(right_runs, buffer_size)
+            )
+    return distance, score
+
+
+def write_run(values: "np.ndarray | list[int]", directory: str) -> str:
+    # values sorted, as an int64 file in directory
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".run", delete=False) as f:
+        if np is not None:
+            np.sort(np.asarray(values, dtype=np.int64)).tofile(f)
+        else:
+            array("q", sorted(values)).tofile(f)
+    return f.name
+
+
+def run_buffer_size(max_memory: int) -> int:
+    # Bytes read from each of the runs merged at once
+    size = max_memory // MAX_MERGE_RUNS // RUN_BUFFER_OVERHEAD
+    return max(MIN_RUN_BUFFER_SIZE, size - size % INT64_SIZE)
+
+
+def read_run(path: str, buffer_size: int) -> Iterator[int]:
+    with open(path, "rb") as f:
+        for data in input_stream.read_chunks(f, buffer_size):
+            yield from array("q", data)
+
+
+def merge_runs(runs: list[str], buffer_size: int) -> Iterator[int]:
+    # The values of all runs, in order
+    return heapq.merge(*(read_run(path, buffer_size) for path in runs))
+
+
+def reduce_runs(runs: list[str], directory: str, buffer_size: int) -> list[str]:
+    # Merges runs in groups until at most MAX_MERGE_RUNS are left, so the
+    # open files and read buffers stay bounded
+    while len(runs) > MAX_MERGE_RUNS:
+        merged = []
+        for start in range(0, len(runs), MAX_MERGE_RUNS):
+            group = runs[start : start + MAX_MERGE_RUNS]
+            with tempfile.NamedTemporaryFile(
+                dir=directory, suffix=".run", delete=False
+            ) as f:
+                values = merge_runs(group, buffer_size)
+                while block := array(
+                    "q", itertools.islice(values, buffer_size // INT64_SIZE)
+                ):
+                    block.tofile(f)
+            merged.append(f.name)
+            for path in group:
+                os.remove(path)
+        runs = merged
+    return runs
+
+
+def count_ids(counts: Counter, values: "np.ndarray | list[int]") -> None:
+    if np is not None and isinstance(values, np.ndarray):
+        ids, id_counts = np.unique(values, return_counts=True)
+        counts.update(dict(zip(ids.tolist(), id_counts.tolist())))
+    else:
+        counts.update(values)
+
+
+def similarity_score_sorted(left: Iterator[int], right: Iterator[int]) -> int:
+    # For sorted columns, equal IDs are next to each other. The groups of both
+    # columns are joined like in a merge.
+    right_groups = itertools.groupby(right)
+    right_id, right_group = next(right_groups, (None, None))
+    score = 0
+    for id_, group in itertools.groupby(left):
+        while right_id is not None and right_id < id_:
+            right_id, right_group = next(right_groups, (None, None))
+        if right_id == id_:
+            score += id_ * sum(1 for _ in group) * sum(1 for _ in right_group)
+            right_id, right_group = next(right_groups, (None, None))
+    return score
+
+
+def parse(source: os.PathLike) -> tuple[Column, Column]:
+    return read_input(source)
+
+
+def part1(state: tuple[Column, Column]) -> int:
+    return total_distance(*state)
+
+
+def part2(state: tuple[Column, Column]) -> int:
+    return similarity_score(*state)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
+    parser.add_argument(
+        "--max-memory",
+        type=int,
+        metavar="MIB",
+        help="solve out of core, for inputs larger than memory",
+    )
     args = parser.parse_args()
-    left, right = read_input(args.input)
-    print(f"Day 1, Part 1: {total_distance(left, right)}")
-    print(f"Day 1, Part 2: {similarity_score(left, right)}")
+    if args.input_dir is not None:
+        batch.run(args, 1)
+    elif args.max_memory is not None:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 1)
+            distance, score = cache.get_or_compute_all(
+                (1, 2), lambda: solve_out_of_core(args.input, args.max_memory << 20)
+            )
+            print(f"Day 1, Part 1: {distance}")
+            print(f"Day 1, Part 2: {score}")
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 1)
+            state = answer_cache.lazy(parse, args.input)
+            distance = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 1, Part 1: {distance}")
+            score = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 1, Part 2: {score}")
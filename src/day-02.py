@@ -1,14 +1,38 @@
 import argparse
+import itertools
 import os
+from typing import Iterable, Iterator
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-def read_input(input_file: os.PathLike) -> list[list[int]]:
-    levels = []
-    with open(input_file, "r") as f:
-        for line in f:
-            numbers = [int(n) for n in line.split()]
-            levels.append(numbers)
-    return levels
+import answer_cache
+import batch
+import int_reader
+import profiling
+
+# Ranges of the differences between adjacent levels of increasing and
+# decreasing reports
+DIRECTIONS = ((1, 3), (-3, -1))
+
+# Inputs with at least this many reports are checked with NumPy, if available
+VECTORIZE_THRESHOLD = 1000
+
+# The reports as lists, or for large inputs as all levels in one int64 array
+# and the offsets of the reports in it
+type Reports = list[list[int]] | tuple[np.ndarray, np.ndarray]
+
+
+def read_input(input_file: os.PathLike) -> Reports:
+    if np is None:
+        return int_reader.read_int_rows(input_file)
+    levels, offsets = int_reader.read_int_ragged(input_file)
+    if len(offsets) - 1 < VECTORIZE_THRESHOLD:
+        levels = levels.tolist()
+        return [levels[start:end] for start, end in itertools.pairwise(offsets)]
+    return levels, offsets
 
 
 def is_level_safe(numbers: list) -> int:
@@ -30,7 +54,9 @@ def is_level_safe(numbers: list) -> int:
     return True
 
 
-def count_safe_levels(levels: list[list[int]]) -> int:
+def count_safe_levels(levels: Reports) -> int:
+    if isinstance(levels, tuple):
+        return int(safe_reports_numpy(*levels).sum())
     safe_count = 0
     for numbers in levels:
         if is_level_safe(numbers):
@@ -38,24 +64,119 @@ def count_safe_levels(levels: list[list[int]]) -> int:
     return safe_count
 
 
-def count_safe_levels_with_problem_dampener(levels: list[list[int]]) -> int:
+def first_unsafe_difference(
+    numbers: Iterable[int], min_diff: int, max_diff: int
+) -> int | None:
+    # Index of the first number whose difference to the next one is out of
+    # range, None if there is none
+    it = iter(numbers)
+    prev = next(it, None)
+    for idx, curr in enumerate(it):
+        if not min_diff <= curr - prev <= max_diff:
+            return idx
+        prev = curr
+    return None
+
+
+def without(numbers: list[int], skipped: int) -> Iterator[int]:
+    # The numbers except numbers[skipped], without copying the list
+    return itertools.chain(
+        itertools.islice(numbers, skipped), itertools.islice(numbers, skipped + 1, None)
+    )
+
+
+def is_level_safe_with_problem_dampener(numbers: list[int]) -> bool:
+    # Removing a number after the first out-of-range difference leaves that
+    # difference, removing one before it leaves both of its numbers next to
+    # each other. So only its two numbers are candidates, for each direction.
+    for min_diff, max_diff in DIRECTIONS:
+        unsafe = first_unsafe_difference(numbers, min_diff, max_diff)
+        if unsafe is None:
+            return True
+        for skipped in (unsafe, unsafe + 1):
+            remaining = without(numbers, skipped)
+            if first_unsafe_difference(remaining, min_diff, max_diff) is None:
+                return True
+    return False
+
+
+def count_safe_levels_with_problem_dampener(levels: Reports) -> int:
+    if isinstance(levels, tuple):
+        return int(safe_reports_numpy(*levels, problem_dampener=True).sum())
     safe_count = 0
     for numbers in levels:
-        is_safe = False
-        for skipped in range(len(numbers)):
-            numbers_without_skipped = numbers[:skipped] + numbers[skipped + 1 :]
-            if is_level_safe(numbers_without_skipped):
-                is_safe = True
-                break
-        if is_safe:
+        if is_level_safe_with_problem_dampener(numbers):
             safe_count += 1
     return safe_count
 
 
+def safe_reports_numpy(
+    levels: "np.ndarray", offsets: "np.ndarray", problem_dampener: bool = False
+) -> "np.ndarray":
+    # Whether each report is safe, for all reports at once. The differences
+    # of report i are diffs[starts[i] : diff_ends[i]], those between the last
+    # level of a report and the first of the next are never looked at.
+    starts, ends = offsets[:-1], offsets[1:]
+    diff_ends = np.maximum(ends - 1, starts)
+    diffs = np.diff(levels)
+    safe = np.zeros(len(starts), dtype=bool)
+    for min_diff, max_diff in DIRECTIONS:
+        unsafe = (diffs < min_diff) | (diffs > max_diff)
+        unsafe_before = np.concatenate(([0], np.cumsum(unsafe)))
+        unsafe_count = unsafe_before[diff_ends] - unsafe_before[starts]
+        safe |= unsafe_count == 0
+        if not problem_dampener:
+            continue
+        # Like is_level_safe_with_problem_dampener, only the two levels of the
+        # first unsafe difference of a report are candidates for removal
+        reports = np.flatnonzero(unsafe_count > 0)
+        first_unsafe = np.flatnonzero(unsafe)[unsafe_before[starts[reports]]]
+        report_starts, report_diff_ends = starts[reports], diff_ends[reports]
+        for skipped in (first_unsafe, first_unsafe + 1):
+            # Removing a level removes the differences on both sides of it...
+            remaining = unsafe_count[reports]
+            for removed in (skipped - 1, skipped):
+                in_report = (removed >= report_starts) & (removed < report_diff_ends)
+                remaining = remaining - (
+                    in_report & unsafe[np.clip(removed, 0, len(unsafe) - 1)]
+                )
+            # ...and adds the one between its neighbours, unless it's the
+            # first or last level
+            inner = (skipped > report_starts) & (skipped < report_diff_ends)
+            before = np.where(inner, skipped - 1, skipped)
+            after = np.where(inner, skipped + 1, skipped)
+            joined = levels[after] - levels[before]
+            joined_safe = (min_diff <= joined) & (joined <= max_diff)
+            safe[reports[(remaining == 0) & (~inner | joined_safe)]] = True
+    return safe
+
+
+def parse(source: os.PathLike) -> Reports:
+    return read_input(source)
+
+
+def part1(state: Reports) -> int:
+    return count_safe_levels(state)
+
+
+def part2(state: Reports) -> int:
+    return count_safe_levels_with_problem_dampener(state)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    levels = read_input(args.input)
-    print(f"Day 2, Part 1: {count_safe_levels(levels)}")
-    print(f"Day 2, Part 2: {count_safe_levels_with_problem_dampener(levels)}")
+    if args.input_dir is not None:
+        batch.run(args, 2)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 2)
+            state = answer_cache.lazy(parse, args.input)
+            safe = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 2, Part 1: {safe}")
+            safe_with_problem_dampener = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 2, Part 2: {safe_with_problem_dampener}")
@@ -1,38 +1,274 @@
 import argparse
+import concurrent.futures
+import functools
+import itertools
+import mmap
 import os
 import re
+from typing import Iterable, Iterator, NamedTuple
 
+import answer_cache
+import batch
+import input_stream
+import profiling
+import solutions
 
-def sum_of_multiplications(input_file: os.PathLike) -> int:
-    p = re.compile(r"mul\((\d+),(\d+)\)")
+# Instructions continue across line breaks in part 2, as if the lines were
+# joined, but not in part 1. The pattern allows line breaks anywhere within an
+# instruction. Multiplications without line breaks are groups 1 and 2, those
+# with line breaks (only for part 2) groups 3 and 4, don't() is group 5.
+BREAKS = r"[\r\n]*"
+DIGITS = r"\d[\d\r\n]*"
+INSTRUCTION_PATTERN = re.compile(
+    (
+        r"mul\((\d+),(\d+)\)"
+        rf"|m{BREAKS}u{BREAKS}l{BREAKS}\({BREAKS}({DIGITS}),{BREAKS}({DIGITS})\)"
+        rf"|(d{BREAKS}o{BREAKS}n{BREAKS}'{BREAKS}t{BREAKS}\({BREAKS}\))"
+        rf"|d{BREAKS}o{BREAKS}\({BREAKS}\)"
+    ).encode()
+)
+# Beginnings of instructions, which might continue in the next chunk
+PARTIAL_PATTERN = re.compile(
+    rf"m{BREAKS}(u{BREAKS}(l{BREAKS}(\({BREAKS}({DIGITS}(,{BREAKS}({DIGITS})?)?)?)?)?)?"
+    rf"|d{BREAKS}(o{BREAKS}(\({BREAKS}"
+    rf"|n{BREAKS}('{BREAKS}(t{BREAKS}(\({BREAKS})?)?)?)?)?".encode()
+)
+LINE_BREAKS = b"\r\n"
+
+# Bytes of memory mapped files scanned at a time
+WINDOW_SIZE = 1 << 16
+
+# Byte ranges of files scanned in parallel: a few per process, so that they
+# finish at about the same time, but not too small
+RANGES_PER_JOB = 4
+MIN_RANGE_SIZE = 1 << 20
+
+type Instruction = tuple[bytes, bytes, bytes, bytes, bytes]
+
+
+def unfinished_start(text: bytes | mmap.mmap, pos: int, endpos: int) -> int:
+    # Where the unfinished instruction at the end of text[pos:endpos] starts,
+    # endpos if there is none. Each instruction has only one "m" or "d", its
+    # first character, so an unfinished one starts at the last of them, and no
+    # complete instruction contains it.
+    start = max(text.rfind(b"m", pos, endpos), text.rfind(b"d", pos, endpos))
+    if start >= 0 and PARTIAL_PATTERN.fullmatch(text, start, endpos):
+        return start
+    return endpos
+
+
+def windows(
+    data: bytes | mmap.mmap, size: int, pos: int = 0, endpos: int | None = None
+) -> Iterator[tuple[int, int]]:
+    # Ranges of data[pos:endpos] of about size bytes, each ending before an
+    # unfinished instruction, which starts the next range instead
+    if endpos is None:
+        endpos = len(data)
+    end = pos
+    while end < endpos:
+        # Grows until the range is more than an unfinished instruction
+        end = min(end + size, endpos)
+        start = end if end == endpos else unfinished_start(data, pos, end)
+        if start > pos:
+            yield pos, start
+            pos = start
+
+
+def sums_of_instructions(
+    instructions: Iterable[Instruction], enabled: bool
+) -> tuple[int, int, bool]:
+    # Sums of the multiplications (without line breaks) and of the enabled
+    # ones, and whether they're enabled after the last instruction
+    sum_of_muls = 0
+    sum_of_enabled_muls = 0
+    for a, b, broken_a, broken_b, dont in instructions:
+        if a:
+            product = int(a) * int(b)
+            sum_of_muls += product
+        elif broken_a:
+            product = int(broken_a.translate(None, LINE_BREAKS)) * int(
+                broken_b.translate(None, LINE_BREAKS)
+            )
+        else:
+            enabled = not dont
+            continue
+        if enabled:
+            sum_of_enabled_muls += product
+    return sum_of_muls, sum_of_enabled_muls, enabled
+
+
+def segments(input_file: os.PathLike) -> Iterator[tuple[bytes | mmap.mmap, int, int]]:
+    # The input as (text, pos, endpos), so that text[pos:endpos] holds only
+    # complete instructions. Files are scanned as a memory map, a window at a
+    # time, streamed inputs in chunks. The unfinished instruction at the end
+    # of a chunk is carried over to the next one.
+    if not input_stream.is_stream(input_file):
+        with input_stream.mapped(input_file) as data:
+            for pos, endpos in windows(data, WINDOW_SIZE):
+                yield data, pos, endpos
+        return
+    rest = b""
+    with input_stream.open_input(input_file, binary=True) as f:
+        for chunk in input_stream.read_chunks(f):
+            text = rest + chunk
+            start = unfinished_start(text, 0, len(text))
+            yield text, 0, start
+            rest = text[start:]
+
+
+def sums_of_multiplications(input_file: os.PathLike) -> tuple[int, int]:
+    # Both parts in one pass over the input
     sum_of_muls = 0
-    with open(input_file, "r") as f:
-        for line in f:
-            for m in p.finditer(line):
-                sum_of_muls += int(m.group(1)) * int(m.group(2))
-    return sum_of_muls
-
-
-def sum_of_enabled_multiplications(input_file: os.PathLike) -> int:
-    # Filter everything between the start of the string or "do()"
-    # and the end of the string or "don't()"
-    p_do = re.compile(r"(?:^|do\(\)).*?(?:$|don't\(\))")
-    # Then filter for "mul(...)"
-    p_mul = re.compile(r"mul\((\d+),(\d+)\)")
+    sum_of_enabled_muls = 0
+    enabled = True
+    for text, pos, endpos in segments(input_file):
+        instructions = INSTRUCTION_PATTERN.findall(text, pos, endpos)
+        muls, enabled_muls, enabled = sums_of_instructions(instructions, enabled)
+        sum_of_muls += muls
+        sum_of_enabled_muls += enabled_muls
+    return sum_of_muls, sum_of_enabled_muls
+
+
+class RangeSums(NamedTuple):
+    # Sums of the instructions starting in a byte range of the input, for
+    # either state at its start: the multiplications before its first do() or
+    # don't() only count for part 2 if it starts enabled.
+    muls: int
+    leading_muls: int
+    enabled_muls: int
+    # Whether multiplications are enabled after the range, None if it has no
+    # do() or don't()
+    enabled: bool | None
+
+
+def range_instructions(
+    data: bytes | mmap.mmap, start: int, end: int
+) -> Iterator[list[Instruction]]:
+    # The instructions starting in data[start:end], a window at a time. An
+    # instruction can't start within one that started before the range (that
+    # would take a second "m" or "d"), so the range can be scanned on its own.
+    for pos, endpos in windows(data, WINDOW_SIZE, start, end):
+        yield INSTRUCTION_PATTERN.findall(data, pos, endpos)
+    # The unfinished instruction at the end of the range might be completed
+    # after it
+    straddling = unfinished_start(data, start, end)
+    if straddling < end:
+        m = INSTRUCTION_PATTERN.match(data, straddling)
+        if m is not None:
+            yield [m.groups(b"")]
+
+
+def range_sums(input_file: os.PathLike, start: int, end: int) -> RangeSums:
+    # Runs in a worker process, for a range of a file
+    muls = 0
+    leading_muls = 0
+    enabled_muls = 0
+    enabled = None
+    with input_stream.mapped(input_file) as data:
+        for instructions in range_instructions(data, start, end):
+            if enabled is None:
+                first = next(
+                    (
+                        idx
+                        for idx, (a, _, broken_a, _, _) in enumerate(instructions)
+                        if not a and not broken_a
+                    ),
+                    len(instructions),
+                )
+                leading = sums_of_instructions(instructions[:first], True)
+                muls += leading[0]
+                leading_muls += leading[1]
+                # The rest starts with a do() or don't(), which sets enabled
+                instructions = instructions[first:]
+                if not instructions:
+                    continue
+            window_muls, window_enabled_muls, enabled = sums_of_instructions(
+                instructions, bool(enabled)
+            )
+            muls += window_muls
+            enabled_muls += window_enabled_muls
+    return RangeSums(muls, leading_muls, enabled_muls, enabled)
+
+
+def combined_sums(ranges: Iterable[RangeSums]) -> tuple[int, int]:
+    # Both parts from the sums of consecutive ranges, in order
     sum_of_muls = 0
-    with open(input_file, "r") as f:
-        # Make sure to strip the newline characters
-        content = "".join(line.strip("\n") for line in f.readlines())
-    enabled_only = "".join(m.group() for m in p_do.finditer(content))
-    for m in p_mul.finditer(enabled_only):
-        sum_of_muls += int(m.group(1)) * int(m.group(2))
-    return sum_of_muls
+    sum_of_enabled_muls = 0
+    enabled = True
+    for sums in ranges:
+        sum_of_muls += sums.muls
+        if enabled:
+            sum_of_enabled_muls += sums.leading_muls
+        sum_of_enabled_muls += sums.enabled_muls
+        if sums.enabled is not None:
+            enabled = sums.enabled
+    return sum_of_muls, sum_of_enabled_muls
+
+
+def sums_of_multiplications_parallel(
+    input_file: os.PathLike, jobs: int | None
+) -> tuple[int, int]:
+    # Like sums_of_multiplications, with the file split into byte ranges that
+    # are scanned by a process pool. Streamed inputs can't be split.
+    if input_stream.is_stream(input_file):
+        return sums_of_multiplications(input_file)
+    size = os.path.getsize(input_file)
+    jobs = jobs or os.cpu_count() or 1
+    count = min(size // MIN_RANGE_SIZE, RANGES_PER_JOB * jobs)
+    if count < 2:
+        return sums_of_multiplications(input_file)
+    bounds = [size * idx // count for idx in range(count + 1)]
+    # Workers import the module by its name, like the batch mode
+    module = solutions.load(3)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=solutions.load, initargs=(3,)
+    ) as executor:
+        ranges = executor.map(
+            module.range_sums, itertools.repeat(input_file), bounds[:-1], bounds[1:]
+        )
+        return combined_sums(ranges)
+
+
+def parse(source: os.PathLike) -> os.PathLike:
+    # The input is only read while solving, in a single pass
+    return source
+
+
+def solve(state: os.PathLike) -> tuple[int, int]:
+    return sums_of_multiplications(state)
+
+
+def part1(state: os.PathLike) -> int:
+    return solve(state)[0]
+
+
+def part2(state: os.PathLike) -> int:
+    return solve(state)[1]
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
+    # Scan byte ranges of the input file in --jobs processes
+    parser.add_argument("--parallel", action="store_true")
     args = parser.parse_args()
-    input_file = args.input
-    print(f"Day 3, Part 1: {sum_of_multiplications(input_file)}")
-    print(f"Day 3, Part 2: {sum_of_enabled_multiplications(input_file)}")
+    if args.input_dir is not None:
+        batch.run(args, 3)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 3)
+            state = parse(args.input)
+            if args.parallel:
+                compute = functools.partial(
+                    sums_of_multiplications_parallel, state, args.jobs
+                )
+            else:
+                compute = functools.partial(solve, state)
+            # Streamed inputs can only be read once, both parts are computed
+            # at the same time
+            total, enabled_total = cache.get_or_compute_all((1, 2), compute)
+            print(f"Day 3, Part 1: {total}")
+            print(f"Day 3, Part 2: {enabled_total}")
@@ -1,12 +1,209 @@
 import argparse
+import concurrent.futures
+import functools
+import itertools
+import mmap
 import os
+from typing import Iterable, Iterator
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-def read_input(input_file: os.PathLike) -> list[str]:
-    grid = []
-    with open(input_file, "r") as f:
-        grid = [line.strip("\n") for line in f]
-    return grid
+import aho_corasick
+import answer_cache
+import batch
+import input_stream
+import profiling
+import solutions
+
+# Grids with at least this many cells are searched with NumPy, if available
+VECTORIZE_THRESHOLD = 1000
+
+# (row step, column step) of the directions words can be written in
+DIRECTIONS = [
+    (d_row, d_col)
+    for d_row in (-1, 0, 1)
+    for d_col in (-1, 0, 1)
+    if (d_row, d_col) != (0, 0)
+]
+
+# Row bands of grids searched in parallel: a few per process, so that they
+# finish at about the same time, but not too small (in cells)
+BANDS_PER_JOB = 4
+MIN_BAND_SIZE = 1 << 20
+
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+
+# The lines of the grid, or for large grids a (height, width) uint8 array
+type Grid = list[str] | np.ndarray
+
+# A word found in the grid: (word, (row, column) of its first letter,
+# (row step, column step))
+type WordMatch = tuple[str, tuple[int, int], tuple[int, int]]
+
+
+def read_input(input_file: os.PathLike) -> Grid:
+    with input_stream.open_input(input_file, binary=True) as f:
+        data = f.read()
+    if np is not None and len(data) >= VECTORIZE_THRESHOLD:
+        grid = grid_array(data)
+        if grid is not None:
+            return grid
+    return [line.decode() for line in data.splitlines()]
+
+
+def grid_shape(data: bytes | mmap.mmap) -> tuple[int, int, int] | None:
+    # (height, width, line length including the line break) of the grid in
+    # data. None if the lines differ in length.
+    line_length = data.find(b"\n") + 1
+    if line_length == 0:
+        # A single line without a line break
+        return (1, len(data), len(data) + 1) if len(data) > 0 else None
+    width = line_length - 1
+    if width > 0 and data[width - 1] == CARRIAGE_RETURN:
+        width -= 1
+    # The last line break is optional
+    height = -(-len(data) // line_length)
+    if len(data) - (height - 1) * line_length not in (width, line_length):
+        return None
+    # Line breaks at the end of every line, and nowhere else
+    buf = np.frombuffer(data, dtype=np.uint8)
+    line_breaks = buf[line_length - 1 :: line_length]
+    if not (line_breaks == NEWLINE).all():
+        return None
+    if np.count_nonzero(buf == NEWLINE) != len(line_breaks):
+        return None
+    if (
+        width < line_length - 1
+        and not (buf[width::line_length] == CARRIAGE_RETURN).all()
+    ):
+        return None
+    return height, width, line_length
+
+
+def grid_view(data: bytes | mmap.mmap, shape: tuple[int, int, int]) -> "np.ndarray":
+    # The grid as a read-only (height, width) view of data, the line breaks
+    # are skipped by the stride
+    height, width, line_length = shape
+    return np.lib.stride_tricks.as_strided(
+        np.frombuffer(data, dtype=np.uint8),
+        shape=(height, width),
+        strides=(line_length, 1),
+        writeable=False,
+    )
+
+
+def grid_array(data: bytes) -> "np.ndarray | None":
+    shape = grid_shape(data)
+    return None if shape is None else grid_view(data, shape)
+
+
+def count_word_numpy(
+    grid: "np.ndarray", word: str, start_rows: range | None = None
+) -> int:
+    # Occurrences of word in all directions, only those with their first
+    # letter in start_rows if given. For each direction, the letters at the
+    # k-th position of all words that fit into the grid are a shifted slice
+    # of it, compared with the k-th letter at once.
+    height, width = grid.shape
+    if start_rows is None:
+        start_rows = range(height)
+    last = len(word) - 1
+    count = 0
+    for d_row, d_col in DIRECTIONS:
+        # The starts from which the word fits into the grid
+        first_row = max(start_rows.start, -d_row * last)
+        rows = min(start_rows.stop, height - max(0, d_row * last)) - first_row
+        first_col = max(0, -d_col * last)
+        cols = width - max(0, d_col * last) - first_col
+        if rows <= 0 or cols <= 0:
+            continue
+        found = np.ones((rows, cols), dtype=bool)
+        for idx, letter in enumerate(word.encode()):
+            row = first_row + idx * d_row
+            col = first_col + idx * d_col
+            found &= grid[row : row + rows, col : col + cols] == letter
+        count += int(np.count_nonzero(found))
+    return count
+
+
+def count_cross_mas_numpy(grid: "np.ndarray", centre_rows: range | None = None) -> int:
+    # The "A"s in the inner cells (of centre_rows if given), with "M" and "S"
+    # on opposite corners along both diagonals
+    height = grid.shape[0]
+    if centre_rows is None:
+        centre_rows = range(height)
+    first, end = max(1, centre_rows.start), min(height - 1, centre_rows.stop)
+    if end <= first:
+        return 0
+    above, centre, below = (
+        grid[first - 1 : end - 1],
+        grid[first:end],
+        grid[first + 1 : end + 1],
+    )
+    m, a, s = b"MAS"
+    top_left, top_right = above[:, :-2], above[:, 2:]
+    bottom_left, bottom_right = below[:, :-2], below[:, 2:]
+    diagonal = ((top_left == m) & (bottom_right == s)) | (
+        (top_left == s) & (bottom_right == m)
+    )
+    anti_diagonal = ((bottom_left == m) & (top_right == s)) | (
+        (bottom_left == s) & (top_right == m)
+    )
+    return int(np.count_nonzero((centre[:, 1:-1] == a) & diagonal & anti_diagonal))
+
+
+def band_counts(
+    input_file: os.PathLike, shape: tuple[int, int, int], start: int, stop: int
+) -> tuple[int, int]:
+    # Runs in a worker process: both parts for the matches in rows
+    # start:stop of a file, by their first letter (part 1) or centre (part 2).
+    # The slices reach len(word) - 1 rows (the halo) beyond the band, but
+    # matches starting there belong to the neighbouring bands.
+    with input_stream.mapped(input_file) as data:
+        # The views of the memory map have to be gone before it's closed
+        return count_band(grid_view(data, shape), range(start, stop))
+
+
+def count_band(grid: "np.ndarray", rows: range) -> tuple[int, int]:
+    return count_word_numpy(grid, "XMAS", rows), count_cross_mas_numpy(grid, rows)
+
+
+def counts_tiled(input_file: os.PathLike, jobs: int | None) -> tuple[int, int]:
+    # Both parts, with the grid split into row bands that are searched by a
+    # process pool. Each worker maps the file itself. Streamed inputs, ragged
+    # grids and small ones are solved in this process.
+    shape = None
+    if np is not None and not input_stream.is_stream(input_file):
+        with input_stream.mapped(input_file) as data:
+            shape = grid_shape(data)
+    if shape is None:
+        grid = read_input(input_file)
+        return count_xmas(grid), count_cross_mas(grid)
+    height, width, _ = shape
+    jobs = jobs or os.cpu_count() or 1
+    count = min(height, height * width // MIN_BAND_SIZE, BANDS_PER_JOB * jobs)
+    if count < 2:
+        grid = read_input(input_file)
+        return count_xmas(grid), count_cross_mas(grid)
+    bounds = [height * idx // count for idx in range(count + 1)]
+    # Workers import the module by its name, like the batch mode
+    module = solutions.load(4)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=solutions.load, initargs=(4,)
+    ) as executor:
+        bands = executor.map(
+            module.band_counts,
+            itertools.repeat(input_file),
+            itertools.repeat(shape),
+            bounds[:-1],
+            bounds[1:],
+        )
+        xmas_counts, cross_mas_counts = zip(*bands)
+    return sum(xmas_counts), sum(cross_mas_counts)
 
 
 def count_line(
@@ -64,8 +261,11 @@ def a_coords(
     return coords
 
 
-def count_xmas(grid: list[str]) -> int:
+def count_xmas(grid: Grid) -> int:
+    if np is not None and isinstance(grid, np.ndarray):
+        return count_word_numpy(grid, "XMAS")
     searched = "XMAS"
+    width = len(grid[0]) if grid else 0
     xmas_count = 0
     # Horizontal
     for row in range(len(grid)):
@@ -75,7 +275,7 @@ def count_xmas(grid: list[str]) -> int:
         # Backwards
         xmas_count += count_line(grid, start, step, searched[-1::-1])
     # Vertical
-    for col in range(len(grid)):
+    for col in range(width):
         start = (0, col)
         step = (1, 0)
         xmas_count += count_line(grid, start, step, searched)
@@ -91,7 +291,7 @@ def count_xmas(grid: list[str]) -> int:
         xmas_count += count_line(grid, start, step, searched[-1::-1])
     # Start from top row
     # Make sure not to count the main diagonal twice
-    for col in range(1, len(grid)):
+    for col in range(1, width):
         start = (0, col)
         step = (1, 1)
         xmas_count += count_line(grid, start, step, searched)
@@ -107,7 +307,7 @@ def count_xmas(grid: list[str]) -> int:
         xmas_count += count_line(grid, start, step, searched[-1::-1])
     # Start from bottom row
     # Make sure not to count the main diagonal twice
-    for col in range(1, len(grid)):
+    for col in range(1, width):
         start = (len(grid) - 1, col)
         step = (-1, 1)
         xmas_count += count_line(grid, start, step, searched)
@@ -116,7 +316,9 @@ def count_xmas(grid: list[str]) -> int:
     return xmas_count
 
 
-def count_cross_mas(grid: list[str]) -> int:
+def count_cross_mas(grid: Grid) -> int:
+    if np is not None and isinstance(grid, np.ndarray):
+        return count_cross_mas_numpy(grid)
     # Idea:
     # For each "X-MAS", there is a "MAS" in both the diagonal and the
     # anti-diagonal with matching "A" coordinates. So we store the "A"
@@ -124,6 +326,7 @@ def count_cross_mas(grid: list[str]) -> int:
     # them with the anti-diagonal ones. Finally, we count them to get the
     # solution.
     searched = "MAS"
+    width = len(grid[0]) if grid else 0
     # Diagonal (top left - bottom right)
     # Start from left column
     diag_coords = set()
@@ -135,7 +338,7 @@ def count_cross_mas(grid: list[str]) -> int:
         diag_coords |= a_coords(grid, start, step, searched[-1::-1])
     # Start from top row
     # Make sure not to count the main diagonal twice
-    for col in range(1, len(grid)):
+    for col in range(1, width):
         start = (0, col)
         step = (1, 1)
         diag_coords |= a_coords(grid, start, step, searched)
@@ -152,7 +355,7 @@ def count_cross_mas(grid: list[str]) -> int:
         antidiag_coords |= a_coords(grid, start, step, searched[-1::-1])
     # Start from bottom row
     # Make sure not to count the main diagonal twice
-    for col in range(1, len(grid)):
+    for col in range(1, width):
         start = (len(grid) - 1, col)
         step = (-1, 1)
         antidiag_coords |= a_coords(grid, start, step, searched)
@@ -162,10 +365,130 @@ def count_cross_mas(grid: list[str]) -> int:
     return len(intersection)
 
 
+def grid_lines(
+    grid: Grid,
+) -> Iterator[tuple[str, tuple[int, int], tuple[int, int]]]:
+    # Every row, column, diagonal and anti-diagonal as (letters, first cell,
+    # step), like the lines count_xmas goes through
+    if np is not None and isinstance(grid, np.ndarray):
+        grid = [row.tobytes().decode() for row in grid]
+    height = len(grid)
+    width = len(grid[0]) if grid else 0
+    for row, line in enumerate(grid):
+        yield line, (row, 0), (0, 1)
+    for col, letters in enumerate(zip(*grid)):
+        yield "".join(letters), (0, col), (1, 0)
+    # Diagonal (top left - bottom right), from the left column and top row
+    starts = [(row, 0) for row in range(height)] + [(0, col) for col in range(1, width)]
+    for row, col in starts:
+        length = min(height - row, width - col)
+        letters = "".join(grid[row + k][col + k] for k in range(length))
+        yield letters, (row, col), (1, 1)
+    # Anti-diagonal (bottom left - top right), from the left column and
+    # bottom row
+    starts = [(row, 0) for row in range(height)]
+    starts += [(height - 1, col) for col in range(1, width)]
+    for row, col in starts:
+        length = min(row + 1, width - col)
+        letters = "".join(grid[row - k][col + k] for k in range(length))
+        yield letters, (row, col), (-1, 1)
+
+
+def word_matches(grid: Grid, words: Iterable[str]) -> Iterator[WordMatch]:
+    # (word, first cell, direction) of every occurrence of the words in all
+    # directions. Every line is streamed once through an automaton of the
+    # words and their reversals; a reversed word is the word written in the
+    # opposite direction.
+    words = list(dict.fromkeys(words))
+    patterns = list(dict.fromkeys(words + [word[::-1] for word in words]))
+    # For each pattern, the words it is (word, whether backwards)
+    found = {pattern: [] for pattern in patterns}
+    for word in words:
+        found[word].append((word, False))
+        found[word[::-1]].append((word, True))
+    found = [found[pattern] for pattern in patterns]
+    automaton = aho_corasick.Automaton(patterns)
+    for letters, (row, col), (d_row, d_col) in grid_lines(grid):
+        for end, pattern in automaton.search(letters):
+            start = end - len(patterns[pattern]) + 1
+            for word, backwards in found[pattern]:
+                if backwards:
+                    first, direction = end, (-d_row, -d_col)
+                else:
+                    first, direction = start, (d_row, d_col)
+                yield word, (row + first * d_row, col + first * d_col), direction
+
+
+def count_words(grid: Grid, words: Iterable[str]) -> dict[str, int]:
+    # Occurrences of each word in all directions
+    words = list(words)
+    counts = dict.fromkeys(words, 0)
+    for word, _, _ in word_matches(grid, words):
+        counts[word] += 1
+    return counts
+
+
+def find_words(
+    grid: Grid, words: Iterable[str]
+) -> dict[str, list[tuple[tuple[int, int], tuple[int, int]]]]:
+    # (first cell, direction) of each occurrence of each word
+    words = list(words)
+    found = {word: [] for word in words}
+    for word, cell, direction in word_matches(grid, words):
+        found[word].append((cell, direction))
+    return found
+
+
+def parse(source: os.PathLike) -> Grid:
+    return read_input(source)
+
+
+def part1(state: Grid) -> int:
+    return count_xmas(state)
+
+
+def part2(state: Grid) -> int:
+    return count_cross_mas(state)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
+    # Search for the words in a file (one per line) instead of solving
+    parser.add_argument("--words", type=str, default=None)
+    parser.add_argument("--coordinates", action="store_true")
+    # Search row bands of the input file in --jobs processes
+    parser.add_argument("--parallel", action="store_true")
     args = parser.parse_args()
-    grid = read_input(args.input)
-    print(f"Day 4, Part 1: {count_xmas(grid)}")
-    print(f"Day 4, Part 2: {count_cross_mas(grid)}")
+    if args.input_dir is not None:
+        batch.run(args, 4)
+    elif args.words is not None:
+        with open(args.words) as f:
+            words = [line.strip() for line in f if line.strip()]
+        grid = parse(args.input)
+        if args.coordinates:
+            for word, matches in find_words(grid, words).items():
+                print(f"{word}: {len(matches)}")
+                for (row, col), (d_row, d_col) in matches:
+                    print(f"  {row},{col} {d_row},{d_col}")
+        else:
+            for word, count in count_words(grid, words).items():
+                print(f"{word}: {count}")
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 4)
+            if args.parallel:
+                xmas_count, cross_mas_count = cache.get_or_compute_all(
+                    (1, 2), functools.partial(counts_tiled, args.input, args.jobs)
+                )
+                print(f"Day 4, Part 1: {xmas_count}")
+                print(f"Day 4, Part 2: {cross_mas_count}")
+            else:
+                state = answer_cache.lazy(parse, args.input)
+                xmas_count = cache.get_or_compute(1, lambda: part1(state()))
+                print(f"Day 4, Part 1: {xmas_count}")
+                cross_mas_count = cache.get_or_compute(2, lambda: part2(state()))
+                print(f"Day 4, Part 2: {cross_mas_count}")
@@ -2,12 +2,18 @@ import argparse
 import functools
 import os
 
+import answer_cache
+import batch
+import input_stream
+import profiling
 
-def sum_of_middles(input_file: os.PathLike) -> tuple[int, int]:
-    sum_of_correct_middles = 0
-    sum_of_fixed_middles = 0
+
+def read_input(
+    input_file: os.PathLike,
+) -> tuple[dict[int, set[int]], list[list[int]]]:
     after = {}
-    with open(input_file, "r") as f:
+    updates = []
+    with input_stream.open_input(input_file) as f:
         # Read the first section of the input until the blank line
         # (page ordering rules)
         while (line := f.readline().strip("\n")) != "":
@@ -15,22 +21,34 @@ def sum_of_middles(input_file: os.PathLike) -> tuple[int, int]:
             after[a] = after.get(a, set()) | {b}
         # Read the second section of the input (updates)
         while (line := f.readline().strip("\n")) != "":
-            numbers = [int(n) for n in line.split(",")]
-            before = set()
-            correctly_ordered = True
-            for n in numbers:
-                if len(before & after[n]) != 0:
-                    correctly_ordered = False
-                    break
-                before |= {n}
-            if correctly_ordered:
-                middle = numbers[len(numbers) // 2]
-                sum_of_correct_middles += middle
-            else:
-                fixed = fix_update(after, numbers)
-                middle = fixed[len(fixed) // 2]
-                sum_of_fixed_middles += middle
-    return sum_of_correct_middles, sum_of_fixed_middles
+            updates.append([int(n) for n in line.split(",")])
+    return after, updates
+
+
+def is_correctly_ordered(after: dict[int, set[int]], update: list[int]) -> bool:
+    before = set()
+    for n in update:
+        if len(before & after[n]) != 0:
+            return False
+        before |= {n}
+    return True
+
+
+def sum_of_correct_middles(after: dict[int, set[int]], updates: list[list[int]]) -> int:
+    return sum(
+        update[len(update) // 2]
+        for update in updates
+        if is_correctly_ordered(after, update)
+    )
+
+
+def sum_of_fixed_middles(after: dict[int, set[int]], updates: list[list[int]]) -> int:
+    sum_of_middles = 0
+    for update in updates:
+        if not is_correctly_ordered(after, update):
+            fixed = fix_update(after, update)
+            sum_of_middles += fixed[len(fixed) // 2]
+    return sum_of_middles
 
 
 def fix_update(after: set[int], update: list[int]) -> list[int]:
@@ -46,11 +64,32 @@ def cmp_updates(a: int, b: int, after: set[int]) -> int:
     return 0
 
 
+def parse(source: os.PathLike) -> tuple[dict[int, set[int]], list[list[int]]]:
+    return read_input(source)
+
+
+def part1(state: tuple[dict[int, set[int]], list[list[int]]]) -> int:
+    return sum_of_correct_middles(*state)
+
+
+def part2(state: tuple[dict[int, set[int]], list[list[int]]]) -> int:
+    return sum_of_fixed_middles(*state)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    sum_of_correct_middles, sum_of_fixed_middles = sum_of_middles(input_file)
-    print(f"Day 5, Part 1: {sum_of_correct_middles}")
-    print(f"Day 5, Part 2: {sum_of_fixed_middles}")
+    if args.input_dir is not None:
+        batch.run(args, 5)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 5)
+            state = answer_cache.lazy(parse, args.input)
+            correct_middles = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 5, Part 1: {correct_middles}")
+            fixed_middles = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 5, Part 2: {fixed_middles}")
@@ -1,106 +1,132 @@
 import argparse
 import os
 
+import answer_cache
+import batch
+import counters
+import input_stream
+import profiling
+from grid import BORDER, Grid
 
-def read_input(
-    input_file: os.PathLike,
-) -> tuple[tuple[int, int], tuple[int, int], set[tuple[int, int]]]:
-    with open(input_file, "r") as f:
-        start = None
-        blocked = set()
-        for row, line in enumerate(f):
-            for col, square in enumerate(line.strip("\n")):
-                if square == "#":
-                    blocked.add((row, col))
-                if square == "^":
-                    start = (row, col)
-        grid_size = (row + 1, col + 1)
-    return grid_size, start, blocked
-
-
-def count_visited_squares(
-    grid_size: tuple[int, int], start: tuple[int, int], blocked: set[tuple[int, int]]
-) -> int:
-    # We start walking up, i.e. decrease the row number
-    step = (-1, 0)
+BLOCKED = ord("#")
+
+
+def read_input(input_file: os.PathLike) -> tuple[Grid, int]:
+    with input_stream.open_input(input_file) as f:
+        grid = Grid.from_lines(f)
+    start = grid.find(ord("^"))
+    return grid, start
+
+
+def count_visited_squares(grid: Grid, start: int) -> int:
+    # We start walking up
+    direction = 0
     square = start
-    visited = set()
-    while is_within_bounds(square, grid_size):
-        visited.add(square)
-        square, step = move_or_turn(square, step, blocked)
-    return len(visited)
-
-
-def count_obstructions_with_cycles(
-    grid_size: tuple[int, int],
-    start: tuple[int, int],
-    blocked: set[tuple[int, int]],
-) -> int:
-    # We start walking up, i.e. decrease the row number
-    step = (-1, 0)
+    cells = grid.cells
+    visited = bytearray(len(cells))
+    visited_count = 0
+    while cells[square] != BORDER:
+        if not visited[square]:
+            visited[square] = 1
+            visited_count += 1
+        square, direction = move_or_turn(grid, square, direction)
+    return visited_count
+
+
+def count_obstructions_with_cycles(grid: Grid, start: int) -> int:
+    # We start walking up
+    direction = 0
     square = start
-    obstructions_tried = set()
+    cells = grid.cells
+    obstructions_tried = bytearray(len(cells))
     cycle_count = 0
-    while is_within_bounds(square, grid_size):
-        next_square, next_step = move_or_turn(square, step, blocked)
-        if next_square not in obstructions_tried and contains_cycle(
-            grid_size, square, step, blocked | {next_square}
-        ):
-            cycle_count += 1
-        obstructions_tried.add(next_square)
-        square, step = next_square, next_step
+    while cells[square] != BORDER:
+        next_square, next_direction = move_or_turn(grid, square, direction)
+        if not obstructions_tried[next_square]:
+            # Temporarily place the obstruction in the grid
+            original = cells[next_square]
+            cells[next_square] = BLOCKED
+            if contains_cycle(grid, square, direction):
+                cycle_count += 1
+            cells[next_square] = original
+        obstructions_tried[next_square] = 1
+        square, direction = next_square, next_direction
     return cycle_count
 
 
-def is_within_bounds(square: tuple[int, int], grid_size: tuple[int, int]) -> bool:
-    return 0 <= square[0] < grid_size[0] and 0 <= square[1] < grid_size[1]
-
-
-def move_or_turn(
-    square: tuple[int, int], step: tuple[int, int], blocked: set[tuple[int, int]]
-) -> tuple[tuple[int, int], tuple[int, int]]:
-    next_ = (square[0] + step[0], square[1] + step[1])
-    if next_ in blocked:
-        step = rotate_right(step)
+@profiling.hot
+def move_or_turn(grid: Grid, square: int, direction: int) -> tuple[int, int]:
+    next_ = square + grid.directions[direction]
+    if grid.cells[next_] == BLOCKED:
+        direction = rotate_right(direction)
     else:
         square = next_
-    return square, step
-
-
-def rotate_right(step: tuple[int, int]) -> tuple[int, int]:
-    next_step = {
-        (-1, 0): (0, 1),  # Up -> right
-        (0, 1): (1, 0),  # Right -> down
-        (1, 0): (0, -1),  # Down -> left
-        (0, -1): (-1, 0),  # Left -> up
-    }
-    return next_step[step]
-
-
-def contains_cycle(
-    grid_size: tuple[int, int],
-    start: tuple[int, int],
-    step: tuple[int, int],
-    blocked: set[tuple[int, int]],
-) -> bool:
-    fast = (start, step)
-    slow = (start, step)
-    has_cycle = False
-    while is_within_bounds(fast[0], grid_size):
-        fast = move_or_turn(fast[0], fast[1], blocked)
-        fast = move_or_turn(fast[0], fast[1], blocked)
-        slow = move_or_turn(slow[0], slow[1], blocked)
-        if fast == slow:
-            has_cycle = True
+    return square, direction
+
+
+def rotate_right(direction: int) -> int:
+    # Directions are indices into Grid.directions (up, right, down, left)
+    return (direction + 1) % 4
+
+
+@counters.counted("cycle checks")
+@profiling.hot
+def contains_cycle(grid: Grid, start: int, direction: int) -> bool:
+    # The steps of move_or_turn are inlined, this is the hot loop of part 2
+    cells = grid.cells
+    directions = grid.directions
+    fast, fast_direction = start, direction
+    slow, slow_direction = start, direction
+    while cells[fast] != BORDER:
+        next_ = fast + directions[fast_direction]
+        if cells[next_] == BLOCKED:
+            fast_direction = (fast_direction + 1) % 4
+        else:
+            fast = next_
+        # Don't step any further once the fast walker has left the grid
+        if cells[fast] == BORDER:
             break
-    return has_cycle
+        next_ = fast + directions[fast_direction]
+        if cells[next_] == BLOCKED:
+            fast_direction = (fast_direction + 1) % 4
+        else:
+            fast = next_
+        next_ = slow + directions[slow_direction]
+        if cells[next_] == BLOCKED:
+            slow_direction = (slow_direction + 1) % 4
+        else:
+            slow = next_
+        if fast == slow and fast_direction == slow_direction:
+            return True
+    return False
+
+
+def parse(source: os.PathLike) -> tuple[Grid, int]:
+    return read_input(source)
+
+
+def part1(state: tuple[Grid, int]) -> int:
+    return count_visited_squares(*state)
+
+
+def part2(state: tuple[Grid, int]) -> int:
+    return count_obstructions_with_cycles(*state)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    grid_size, start, blocked = read_input(input_file)
-    print(f"Day 6, Part 1: {count_visited_squares(grid_size, start, blocked)}")
-    print(f"Day 6, Part 2: {count_obstructions_with_cycles(grid_size, start, blocked)}")
+    if args.input_dir is not None:
+        batch.run(args, 6)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 6)
+            state = answer_cache.lazy(parse, args.input)
+            visited = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 6, Part 1: {visited}")
+            obstructions = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 6, Part 2: {obstructions}")
@@ -1,22 +1,28 @@
 import argparse
 import os
+from typing import Callable
 
+import answer_cache
+import batch
+import int_reader
+import profiling
 
-def total_calibration_result(
+
+def read_input(
     input_file: os.PathLike,
-) -> tuple[int, int]:
-    two_op_total = 0
-    three_op_total = 0
-    with open(input_file, "r") as f:
-        for line in f:
-            test_value_str, numbers_str = line.strip("\n").split(":")
-            test_value = int(test_value_str)
-            numbers = [int(n) for n in numbers_str.strip(" ").split(" ")]
-            if can_produce_2_op(test_value, numbers[0], numbers[1:]):
-                two_op_total += test_value
-            if can_produce_3_op(test_value, numbers[0], numbers[1:]):
-                three_op_total += test_value
-    return two_op_total, three_op_total
+) -> list[list[int]]:
+    # Test value followed by the numbers, one list per equation
+    return int_reader.read_int_rows(input_file)
+
+
+def total_calibration_result(
+    equations: list[list[int]], can_produce: Callable[[int, int, list[int]], bool]
+) -> int:
+    total = 0
+    for test_value, *numbers in equations:
+        if can_produce(test_value, numbers[0], numbers[1:]):
+            total += test_value
+    return total
 
 
 def can_produce_2_op(test_value: int, initial: int, remaining: list[int]) -> bool:
@@ -27,6 +33,7 @@ def can_produce_2_op(test_value: int, initial: int, remaining: list[int]) -> boo
     ) or can_produce_2_op(test_value, initial * remaining[0], remaining[1:])
 
 
+@profiling.hot
 def can_produce_3_op(test_value: int, initial: int, remaining: list[int]) -> bool:
     if not remaining:
         return test_value == initial
@@ -37,11 +44,32 @@ def can_produce_3_op(test_value: int, initial: int, remaining: list[int]) -> boo
     )
 
 
+def parse(source: os.PathLike) -> list[list[int]]:
+    return read_input(source)
+
+
+def part1(state: list[list[int]]) -> int:
+    return total_calibration_result(state, can_produce_2_op)
+
+
+def part2(state: list[list[int]]) -> int:
+    return total_calibration_result(state, can_produce_3_op)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    two_op_total, three_op_total = total_calibration_result(input_file)
-    print(f"Day 7, Part 1: {two_op_total}")
-    print(f"Day 7, Part 2: {three_op_total}")
+    if args.input_dir is not None:
+        batch.run(args, 7)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 7)
+            state = answer_cache.lazy(parse, args.input)
+            two_op_total = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 7, Part 1: {two_op_total}")
+            three_op_total = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 7, Part 2: {three_op_total}")
@@ -1,29 +1,45 @@
 import argparse
 import os
+from typing import Callable
 
+import answer_cache
+import batch
+import input_stream
+import profiling
 
-def count_unique_locations(
+
+def read_input(
     input_file: os.PathLike,
-) -> tuple[int, int]:
+) -> tuple[tuple[int, int], dict[str, list[tuple[int, int]]]]:
     grid = []
-    with open(input_file, "r") as f:
+    with input_stream.open_input(input_file) as f:
         for line in f:
             grid.append(line.strip("\n"))
     grid_size = (len(grid), len(grid[0]))
+    # Locations of the antennas per frequency, in reading order
     antennas = {}
-    antinodes = set()
-    antinodes_with_harmonics = set()
     for row, line in enumerate(grid):
         for col, symbol in enumerate(line):
             if symbol != ".":
-                new_antenna = (row, col)
-                antenna_locations = antennas.get(symbol, set())
-                antinodes |= new_antinodes(new_antenna, antenna_locations, grid_size)
-                antinodes_with_harmonics |= new_antinodes_with_harmonics(
-                    new_antenna, antenna_locations, grid_size
-                )
-                antennas[symbol] = antenna_locations | {new_antenna}
-    return len(antinodes), len(antinodes_with_harmonics)
+                antennas.setdefault(symbol, []).append((row, col))
+    return grid_size, antennas
+
+
+def count_unique_locations(
+    grid_size: tuple[int, int],
+    antennas: dict[str, list[tuple[int, int]]],
+    find_antinodes: Callable[
+        [tuple[int, int], set[tuple[int, int]], tuple[int, int]], set[tuple[int, int]]
+    ],
+) -> int:
+    antinodes = set()
+    for locations in antennas.values():
+        # Each antenna pairs with the ones of the same frequency before it
+        antenna_locations = set()
+        for new_antenna in locations:
+            antinodes |= find_antinodes(new_antenna, antenna_locations, grid_size)
+            antenna_locations.add(new_antenna)
+    return len(antinodes)
 
 
 def new_antinodes(
@@ -80,13 +96,36 @@ def is_within_bounds(position: tuple[int, int], grid_size: tuple[int, int]) -> b
     return 0 <= position[0] < grid_size[0] and 0 <= position[1] < grid_size[1]
 
 
+def parse(
+    source: os.PathLike,
+) -> tuple[tuple[int, int], dict[str, list[tuple[int, int]]]]:
+    return read_input(source)
+
+
+def part1(state: tuple[tuple[int, int], dict[str, list[tuple[int, int]]]]) -> int:
+    return count_unique_locations(*state, new_antinodes)
+
+
+def part2(state: tuple[tuple[int, int], dict[str, list[tuple[int, int]]]]) -> int:
+    return count_unique_locations(*state, new_antinodes_with_harmonics)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    unique_location_count, unique_location_count_with_harmonics = (
-        count_unique_locations(input_file)
-    )
-    print(f"Day 8, Part 1: {unique_location_count}")
-    print(f"Day 8, Part 2: {unique_location_count_with_harmonics}")
+    if args.input_dir is not None:
+        batch.run(args, 8)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 8)
+            state = answer_cache.lazy(parse, args.input)
+            unique_location_count = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 8, Part 1: {unique_location_count}")
+            unique_location_count_with_harmonics = cache.get_or_compute(
+                2, lambda: part2(state())
+            )
+            print(f"Day 8, Part 2: {unique_location_count_with_harmonics}")
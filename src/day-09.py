@@ -1,21 +1,36 @@
 import argparse
+import itertools
 import os
+from typing import Iterator
+
+import answer_cache
+import batch
+import input_stream
+import profiling
+
+
+def read_digits(
+    input_file: os.PathLike,
+) -> Iterator[int]:
+    # The digits of the (single, long) line, read in chunks
+    with input_stream.open_input(input_file) as f:
+        for chunk in input_stream.read_chunks(f):
+            digits, newline, _ = chunk.partition("\n")
+            yield from map(int, digits)
+            if newline:
+                return
 
 
 def read_numbers(
     input_file: os.PathLike,
 ) -> list[int]:
-    with open(input_file, "r") as f:
-        numbers = [int(n) for n in f.readline().strip("\n")]
-    return numbers
+    return list(read_digits(input_file))
 
 
 def read_blocks(
     input_file: os.PathLike,
 ) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
-    with open(input_file, "r") as f:
-        numbers = [int(n) for n in f.readline().strip("\n")]
-    it = iter(numbers + [0])
+    it = itertools.chain(read_digits(input_file), [0])
     file_blocks = []
     free_blocks = []
     pos = 0
@@ -72,7 +87,9 @@ def calc_checksum_file_blocks_readable(
     checksum = 0
     first_free_idx = 0
     for file_id, (file_pos, file_len) in reversed(list(enumerate(file_blocks))):
-        for free_idx, (free_pos, free_len) in enumerate(free_blocks[first_free_idx:], first_free_idx):
+        for free_idx, (free_pos, free_len) in enumerate(
+            free_blocks[first_free_idx:], first_free_idx
+        ):
             if file_pos < free_pos:
                 break
             if free_len > 0:
@@ -115,14 +132,39 @@ def calc_checksum_block(file_id: int, start_pos: int, length: int) -> int:
     return int(file_id * (start_pos + (length - 1) / 2) * length)
 
 
+def parse(
+    source: os.PathLike,
+) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    return read_blocks(source)
+
+
+def part1(state: tuple[list[tuple[int, int]], list[tuple[int, int]]]) -> int:
+    # The checksum functions modify the free blocks in place
+    file_blocks, free_blocks = state
+    return calc_checksum_file_blocks_readable(file_blocks, list(free_blocks))
+
+
+def part2(state: tuple[list[tuple[int, int]], list[tuple[int, int]]]) -> int:
+    file_blocks, free_blocks = state
+    return calc_checksum_whole_files(file_blocks, list(free_blocks))
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    # numbers = read_numbers(input_file)
-    # print(f"Day 9, Part 1: {calc_checksum_file_blocks_fast(numbers)}")
-    file_blocks, free_blocks = read_blocks(input_file)
-    print(f"Day 9, Part 1: {calc_checksum_file_blocks_readable(file_blocks, free_blocks)}")
-    file_blocks, free_blocks = read_blocks(input_file)
-    print(f"Day 9, Part 2: {calc_checksum_whole_files(file_blocks, free_blocks)}")
+    if args.input_dir is not None:
+        batch.run(args, 9)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 9)
+            state = answer_cache.lazy(parse, args.input)
+            # numbers = read_numbers(input_file)
+            # print(f"Day 9, Part 1: {calc_checksum_file_blocks_fast(numbers)}")
+            checksum = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 9, Part 1: {checksum}")
+            checksum_whole_files = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 9, Part 2: {checksum_whole_files}")
@@ -1,74 +1,84 @@
 import argparse
 import os
 
+import answer_cache
+import batch
+import input_stream
+import profiling
+from grid import Grid
+
+# Heights are stored as the digit characters. The padding around the grid
+# never matches a height, so there's no need for bounds checks.
+TRAILHEAD = ord("0")
+PEAK = ord("9")
+
 
 def read_input(
     input_file: os.PathLike,
-) -> list[list[int]]:
-    grid = []
-    with open(input_file, "r") as f:
-        for line in f:
-            grid.append([int(n) for n in line.strip("\n")])
+) -> Grid:
+    with input_stream.open_input(input_file) as f:
+        grid = Grid.from_lines(f)
     return grid
 
 
-def sum_of_trailhead_scores_and_ratings(grid: list[list[int]]) -> tuple[int, int]:
+def sum_of_trailhead_scores_and_ratings(grid: Grid) -> tuple[int, int]:
     sum_of_scores = 0
     sum_of_ratings = 0
-    for row, line in enumerate(grid):
-        for col, height in enumerate(line):
-            if height != 0:
-                continue
-            nines_reached, trail_count = find_trails(grid, (row, col), height)
-            sum_of_scores += len(nines_reached)
-            sum_of_ratings += trail_count
+    for square in grid.find_all(TRAILHEAD):
+        nines_reached, trail_count = find_trails(grid, square, TRAILHEAD)
+        sum_of_scores += len(nines_reached)
+        sum_of_ratings += trail_count
     return sum_of_scores, sum_of_ratings
 
 
-def find_trails(
-    grid: list[list[int]], curr_square: tuple[int, int], curr_height: int
-) -> tuple[set[tuple[int, int]], int]:
-    if curr_height == 9:
+def find_trails(grid: Grid, curr_square: int, curr_height: int) -> tuple[set[int], int]:
+    if curr_height == PEAK:
         return {curr_square}, 1
     nines_reached = set()
     trail_count = 0
-    for neighbor in get_neighbors(curr_square, grid):
-        neighbor_height = grid[neighbor[0]][neighbor[1]]
-        if neighbor_height != curr_height + 1:
+    for step in grid.directions:
+        neighbor = curr_square + step
+        if grid.cells[neighbor] != curr_height + 1:
             continue
         diff_nines_reached, diff_trail_count = find_trails(
-            grid, neighbor, neighbor_height
+            grid, neighbor, curr_height + 1
         )
         nines_reached |= diff_nines_reached
         trail_count += diff_trail_count
     return nines_reached, trail_count
 
 
-def get_neighbors(
-    square: tuple[int, int], grid: list[list[int]]
-) -> list[tuple[int, int]]:
-    neighbors = []
-    row = square[0]
-    col = square[1]
-    top = (row - 1, col)
-    right = (row, col + 1)
-    bottom = (row + 1, col)
-    left = (row, col - 1)
-    neighbors = [n for n in [top, right, bottom, left] if is_within_bounds(n, grid)]
-    return neighbors
+def parse(source: os.PathLike) -> Grid:
+    return read_input(source)
+
+
+def solve(state: Grid) -> tuple[int, int]:
+    return sum_of_trailhead_scores_and_ratings(state)
+
+
+def part1(state: Grid) -> int:
+    return solve(state)[0]
 
 
-def is_within_bounds(square: tuple[int, int], grid: list[list[int]]) -> bool:
-    grid_size = (len(grid), len(grid[0]))
-    return 0 <= square[0] < grid_size[0] and 0 <= square[1] < grid_size[1]
+def part2(state: Grid) -> int:
+    return solve(state)[1]
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    grid = read_input(input_file)
-    sum_of_scores, sum_of_ratings = sum_of_trailhead_scores_and_ratings(grid)
-    print(f"Day 10, Part 1: {sum_of_scores}")
-    print(f"Day 10, Part 2: {sum_of_ratings}")
+    if args.input_dir is not None:
+        batch.run(args, 10)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 10)
+            state = answer_cache.lazy(parse, args.input)
+            sum_of_scores, sum_of_ratings = cache.get_or_compute_all(
+                (1, 2), lambda: solve(state())
+            )
+            print(f"Day 10, Part 1: {sum_of_scores}")
+            print(f"Day 10, Part 2: {sum_of_ratings}")
@@ -1,17 +1,22 @@
 import argparse
 import os
 
+import answer_cache
+import batch
+import counters
+import int_reader
+import profiling
+
 
 def read_input(
     input_file: os.PathLike,
 ) -> list[int]:
-    with open(input_file, "r") as f:
-        stones = [int(n) for n in f.readline().strip("\n").split(" ")]
-    return stones
+    return int_reader.read_ints(input_file)
 
 
 def count_stones(stones: list[int], blink_count: int) -> int:
-    return count_stones_recursively(stones, blink_count, {})
+    cache = counters.cache("count_stones_recursively")
+    return count_stones_recursively(stones, blink_count, cache)
 
 
 def count_stones_recursively(
@@ -40,11 +45,32 @@ def blink(number: int) -> list[int]:
         return [number * 2024]
 
 
+def parse(source: os.PathLike) -> list[int]:
+    return read_input(source)
+
+
+def part1(state: list[int]) -> int:
+    return count_stones(state, 25)
+
+
+def part2(state: list[int]) -> int:
+    return count_stones(state, 75)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    initial = read_input(input_file)
-    print(f"Day 11, Part 1: {count_stones(initial, 25)}")
-    print(f"Day 11, Part 2: {count_stones(initial, 75)}")
+    if args.input_dir is not None:
+        batch.run(args, 11)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 11)
+            state = answer_cache.lazy(parse, args.input)
+            stones_25 = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 11, Part 1: {stones_25}")
+            stones_75 = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 11, Part 2: {stones_75}")
@@ -1,112 +1,70 @@
 import argparse
 import os
 
+import answer_cache
+import batch
+import input_stream
+import profiling
+from grid import Grid
+
 
 def read_input(
     input_file: os.PathLike,
-) -> list[str]:
-    grid = []
-    with open(input_file, "r") as f:
-        for line in f:
-            grid.append(line.strip("\n"))
+) -> Grid:
+    with input_stream.open_input(input_file) as f:
+        grid = Grid.from_lines(f)
     return grid
 
 
-def calc_fencing_price(grid: list[str]) -> tuple[int, int]:
+def calc_fencing_price(grid: Grid) -> tuple[int, int]:
     price_area_perimeter = 0
     price_area_sides = 0
-    visited = set()
-    to_visit = {(0, 0)}
-    while to_visit:
-        current = to_visit.pop()
-        same_plant, not_same_plant, perimeter, sides = calc_area_perimeter_sides(
-            current, grid
-        )
-        area = len(same_plant)
+    visited = bytearray(len(grid.cells))
+    for square in grid.indices():
+        if visited[square]:
+            continue
+        area, perimeter, sides = calc_area_perimeter_sides(square, grid, visited)
         price_area_perimeter += area * perimeter
         price_area_sides += area * sides
-        visited |= same_plant
-        to_visit -= same_plant
-        to_visit |= {
-            d for d in not_same_plant if is_within_bounds(d, grid) and d not in visited
-        }
     return price_area_perimeter, price_area_sides
 
 
 def calc_area_perimeter_sides(
-    square: tuple[int, int], grid: list[str]
-) -> tuple[set[tuple[int, int]], set[tuple[int, int]], int, int]:
-    plant_type = grid[square[0]][square[1]]
-    # Used to calculate the area
-    same_plant = {square}
-    # Different plant or outside the grid
-    not_same_plant = set()
+    square: int, grid: Grid, visited: bytearray
+) -> tuple[int, int, int]:
+    cells = grid.cells
+    plant_type = cells[square]
+    # The padding around the grid is never the same plant, so squares outside
+    # the grid don't need special treatment
+    area = 0
     perimeter = 0
     sides = 0
-    to_visit = {square}
+    visited[square] = 1
+    to_visit = [square]
     while to_visit:
         current = to_visit.pop()
-        neighbors = get_neighbors(current)
-        neighbors_outside_plant = []
-        for neighbor in neighbors:
-            if (
-                is_within_bounds(neighbor, grid)
-                and grid[neighbor[0]][neighbor[1]] == plant_type
-            ):
-                if neighbor not in same_plant:
-                    same_plant.add(neighbor)
-                    to_visit.add(neighbor)
+        area += 1
+        for step in grid.directions:
+            neighbor = current + step
+            if cells[neighbor] == plant_type:
+                if not visited[neighbor]:
+                    visited[neighbor] = 1
+                    to_visit.append(neighbor)
             else:
-                neighbors_outside_plant.append(neighbor)
-                not_same_plant.add(neighbor)
-        corner_count = count_corners(current, plant_type, neighbors, grid)
-        perimeter += len(neighbors_outside_plant)
+                perimeter += 1
         # The number of sides equals the number of corners
-        sides += corner_count
-    return same_plant, not_same_plant, perimeter, sides
-
-
-def get_neighbors(square: tuple[int, int]) -> tuple[tuple[int, int]]:
-    row = square[0]
-    col = square[1]
-    top = (row - 1, col)
-    right = (row, col + 1)
-    bottom = (row + 1, col)
-    left = (row, col - 1)
-    return top, right, bottom, left
-
-
-def get_diag_neighbors(square: tuple[int, int]) -> tuple[tuple[int, int]]:
-    row = square[0]
-    col = square[1]
-    top_left = (row - 1, col - 1)
-    top_right = (row - 1, col + 1)
-    bottom_right = (row + 1, col + 1)
-    bottom_left = (row + 1, col - 1)
-    return top_left, top_right, bottom_right, bottom_left
-
-
-def is_within_bounds(square: tuple[int, int], grid: list[str]) -> bool:
-    grid_size = (len(grid), len(grid[0]))
-    return 0 <= square[0] < grid_size[0] and 0 <= square[1] < grid_size[1]
-
-
-def count_corners(
-    square: tuple[int, int],
-    plant_type: str,
-    neighbors: tuple[tuple[int, int]],
-    grid: list[str],
-) -> int:
-    t, r, b, l = neighbors
-    tl, tr, br, bl = get_diag_neighbors(square)
-    top_same = is_within_bounds(t, grid) and grid[t[0]][t[1]] == plant_type
-    right_same = is_within_bounds(r, grid) and grid[r[0]][r[1]] == plant_type
-    bottom_same = is_within_bounds(b, grid) and grid[b[0]][b[1]] == plant_type
-    left_same = is_within_bounds(l, grid) and grid[l[0]][l[1]] == plant_type
-    top_left_same = is_within_bounds(tl, grid) and grid[tl[0]][tl[1]] == plant_type
-    top_right_same = is_within_bounds(tr, grid) and grid[tr[0]][tr[1]] == plant_type
-    bottom_right_same = is_within_bounds(br, grid) and grid[br[0]][br[1]] == plant_type
-    bottom_left_same = is_within_bounds(bl, grid) and grid[bl[0]][bl[1]] == plant_type
+        sides += count_corners(current, plant_type, grid)
+    return area, perimeter, sides
+
+
+def count_corners(square: int, plant_type: int, grid: Grid) -> int:
+    cells = grid.cells
+    top_same, right_same, bottom_same, left_same = (
+        cells[square + step] == plant_type for step in grid.directions
+    )
+    top_left_same, top_right_same, bottom_right_same, bottom_left_same = (
+        cells[square + step] == plant_type for step in grid.diagonals
+    )
     corner_count = 0
     if top_same:
         # Inward facing corners
@@ -139,12 +97,37 @@ def count_corners(
     return corner_count
 
 
+def parse(source: os.PathLike) -> Grid:
+    return read_input(source)
+
+
+def solve(state: Grid) -> tuple[int, int]:
+    return calc_fencing_price(state)
+
+
+def part1(state: Grid) -> int:
+    return solve(state)[0]
+
+
+def part2(state: Grid) -> int:
+    return solve(state)[1]
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    grid = read_input(input_file)
-    price_area_perimeter, price_area_sides = calc_fencing_price(grid)
-    print(f"Day 12, Part 1: {price_area_perimeter}")
-    print(f"Day 12, Part 2: {price_area_sides}")
+    if args.input_dir is not None:
+        batch.run(args, 12)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 12)
+            state = answer_cache.lazy(parse, args.input)
+            price_area_perimeter, price_area_sides = cache.get_or_compute_all(
+                (1, 2), lambda: solve(state())
+            )
+            print(f"Day 12, Part 1: {price_area_perimeter}")
+            print(f"Day 12, Part 2: {price_area_sides}")
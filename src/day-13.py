@@ -2,6 +2,11 @@ import argparse
 import os
 import re
 
+import answer_cache
+import batch
+import input_stream
+import profiling
+
 type ClawMachine = tuple[tuple[int, int], tuple[int, int], tuple[int, int]]
 
 
@@ -11,7 +16,7 @@ def read_input(
     claw_machines = []
     p_button = re.compile(r"Button \w: X\+(\d+), Y\+(\d+)")
     p_prize = re.compile(r"Prize: X=(\d+), Y=(\d+)")
-    with open(input_file, "r") as f:
+    with input_stream.open_input(input_file) as f:
         while (line := f.readline().strip("\n")) != "":
             a = tuple(int(n) for n in p_button.match(line).groups())
             line = f.readline().strip("\n")
@@ -46,13 +51,32 @@ def calc_tokens(
         return 0
 
 
+def parse(source: os.PathLike) -> list[ClawMachine]:
+    return read_input(source)
+
+
+def part1(state: list[ClawMachine]) -> int:
+    return calc_total_tokens(state)
+
+
+def part2(state: list[ClawMachine]) -> int:
+    return calc_total_tokens(state, 10000000000000)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    claw_machines = read_input(input_file)
-    tokens = calc_total_tokens(claw_machines)
-    tokens_with_offset = calc_total_tokens(claw_machines, 10000000000000)
-    print(f"Day 13, Part 1: {tokens}")
-    print(f"Day 13, Part 2: {tokens_with_offset}")
+    if args.input_dir is not None:
+        batch.run(args, 13)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 13)
+            state = answer_cache.lazy(parse, args.input)
+            tokens = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 13, Part 1: {tokens}")
+            tokens_with_offset = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 13, Part 2: {tokens_with_offset}")
@@ -3,15 +3,24 @@ import heapq
 import os
 import re
 
+import answer_cache
+import batch
+import input_stream
+import profiling
+
 type Robot = tuple[int, int, int, int]
 
+# Size of the area the robots move in
+WIDTH = 101
+HEIGHT = 103
+
 
 def read_input(
     input_file: os.PathLike,
 ) -> list[Robot]:
     robots = []
     p = re.compile(r"p=(\d+),(\d+) v=(-?\d+),(-?\d+)")
-    with open(input_file, "r") as f:
+    with input_stream.open_input(input_file) as f:
         for line in f:
             robot = tuple(int(n) for n in p.match(line.strip("\n")).groups())
             robots.append(robot)
@@ -72,19 +81,32 @@ def calc_position(
     return x, y
 
 
+def parse(source: os.PathLike) -> list[Robot]:
+    return read_input(source)
+
+
+def part1(state: list[Robot]) -> int:
+    return calc_safety_factor(state, WIDTH, HEIGHT, 100)
+
+
+def part2(state: list[Robot]) -> int:
+    return find_christmas_tree(state, WIDTH, HEIGHT, WIDTH * HEIGHT)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    robots = read_input(input_file)
-    width = 101
-    height = 103
-    elapsed_seconds = 100
-    max_elapsed_seconds = width * height
-    safety_factor = calc_safety_factor(robots, width, height, elapsed_seconds)
-    seconds_to_christmas_tree = find_christmas_tree(
-        robots, width, height, max_elapsed_seconds
-    )
-    print(f"Day 14, Part 1: {safety_factor}")
-    print(f"Day 14, Part 2: {seconds_to_christmas_tree}")
+    if args.input_dir is not None:
+        batch.run(args, 14)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 14)
+            state = answer_cache.lazy(parse, args.input)
+            safety_factor = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 14, Part 1: {safety_factor}")
+            seconds_to_christmas_tree = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 14, Part 2: {seconds_to_christmas_tree}")
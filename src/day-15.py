@@ -1,270 +1,218 @@
 import argparse
+import itertools
 import os
 
+import answer_cache
+import batch
+import input_stream
+import profiling
+from grid import Grid
+
+ROBOT = ord("@")
+BOX = ord("O")
+BOX_LEFT = ord("[")
+BOX_RIGHT = ord("]")
+WALL = ord("#")
+EMPTY = ord(".")
+
 
 def read_input(
     input_file: os.PathLike,
-) -> tuple[tuple[int, int], set[tuple[int, int]], set[tuple[int, int]], str]:
-    boxes = set()
-    walls = set()
-    with open(input_file, "r") as f:
-        row = 0
-        while (line := f.readline().strip("\n")) != "":
-            for col, char in enumerate(line):
-                match char:
-                    case "@":
-                        robot = (row, col)
-                    case "O":
-                        boxes.add((row, col))
-                    case "#":
-                        walls.add((row, col))
-                    case _:
-                        pass
-            row += 1
-        moves = "".join(line.strip("\n") for line in f.readlines())
-    return robot, boxes, walls, moves
-
-
-def make_moves(
-    robot: tuple[int, int],
-    boxes: set[tuple[int, int]],
-    walls: set[tuple[int, int]],
-    moves: str,
-) -> tuple[tuple[int, int], set[tuple[int, int]]]:
-    direction = {"^": (-1, 0), "v": (1, 0), "<": (0, -1), ">": (0, 1)}
+) -> tuple[Grid, int, str]:
+    with input_stream.open_input(input_file) as f:
+        # Read the warehouse until the blank line
+        grid = Grid.from_lines(itertools.takewhile(lambda line: line != "\n", f))
+        # The moves are read in chunks, not line by line
+        moves = "".join(
+            chunk.replace("\n", "") for chunk in input_stream.read_chunks(f)
+        )
+    # The robot is tracked separately, its square is empty
+    robot = grid.find(ROBOT)
+    grid[robot] = EMPTY
+    return grid, robot, moves
+
+
+def make_moves(grid: Grid, robot: int, moves: str) -> tuple[int, Grid]:
+    direction = {"^": grid.up, "v": grid.down, "<": grid.left, ">": grid.right}
+    cells = grid.cells
     for m in moves:
         step = direction[m]
-        target = (robot[0] + step[0], robot[1] + step[1])
-        if target in boxes:
-            should_move = move_boxes(boxes, walls, target, step)
-        elif target in walls:
+        target = robot + step
+        if cells[target] == BOX:
+            should_move = move_boxes(grid, target, step)
+        elif cells[target] == WALL:
             should_move = False
         else:
             # Empty space
             should_move = True
         if should_move:
             robot = target
-    return robot, boxes
+    return robot, grid
 
 
-def move_boxes(
-    boxes: set[tuple[int, int]],
-    walls: set[tuple[int, int]],
-    origin: tuple[int, int],
-    step: tuple[int, int],
-) -> bool:
+def move_boxes(grid: Grid, origin: int, step: int) -> bool:
+    cells = grid.cells
     box_moved = False
-    target = (origin[0] + step[0], origin[1] + step[1])
-    while target in boxes:
-        target = (target[0] + step[0], target[1] + step[1])
-    if target not in walls:
-        boxes.remove(origin)
-        boxes.add(target)
+    target = origin + step
+    while cells[target] == BOX:
+        target += step
+    if cells[target] != WALL:
+        cells[origin] = EMPTY
+        cells[target] = BOX
         box_moved = True
     return box_moved
 
 
-def calc_sum_of_gps(boxes: set[tuple[int, int]]) -> int:
+def calc_sum_of_gps(grid: Grid) -> int:
     sum_of_gps = 0
-    for box in boxes:
-        sum_of_gps += 100 * box[0] + box[1]
+    for idx in grid.indices():
+        if grid.cells[idx] in (BOX, BOX_LEFT):
+            row, col = grid.position(idx)
+            sum_of_gps += 100 * row + col
     return sum_of_gps
 
 
-def convert_to_wide_warehouse(
-    robot: tuple[int, int], boxes: set[tuple[int, int]], walls: set[tuple[int, int]]
-) -> tuple[tuple[int, int], set[tuple[int, int]], set[tuple[int, int]]]:
-    wide_robot = (robot[0], 2 * robot[1])
-    wide_boxes = set()
-    wide_walls = set()
-    for box in boxes:
-        wide_boxes.add((box[0], 2 * box[1]))
-    for wall in walls:
-        wide_walls.add((wall[0], 2 * wall[1]))
-        wide_walls.add((wall[0], 2 * wall[1] + 1))
-    return wide_robot, wide_boxes, wide_walls
-
-
-def make_moves_wide_warehouse(
-    robot: tuple[int, int],
-    boxes: set[tuple[int, int]],
-    walls: set[tuple[int, int]],
-    moves: str,
-) -> tuple[tuple[int, int], set[tuple[int, int]]]:
-    direction = {"^": (-1, 0), "v": (1, 0), "<": (0, -1), ">": (0, 1)}
+def convert_to_wide_warehouse(grid: Grid, robot: int) -> tuple[Grid, int]:
+    wide_tiles = str.maketrans({"#": "##", "O": "[]", ".": ".."})
+    wide_grid = Grid.from_lines(line.translate(wide_tiles) for line in grid.to_lines())
+    row, col = grid.position(robot)
+    wide_robot = wide_grid.index(row, 2 * col)
+    return wide_grid, wide_robot
+
+
+def make_moves_wide_warehouse(grid: Grid, robot: int, moves: str) -> tuple[int, Grid]:
+    direction = {"^": grid.up, "v": grid.down, "<": grid.left, ">": grid.right}
+    cells = grid.cells
     for m in moves:
         step = direction[m]
-        target = (robot[0] + step[0], robot[1] + step[1])
-        left_target = (target[0], target[1] - 1)
-        if target in boxes:
-            should_move = move_boxes_wide_warehouse(boxes, walls, target, step)
-        elif left_target in boxes:
-            should_move = move_boxes_wide_warehouse(boxes, walls, left_target, step)
-        elif target in walls:
+        target = robot + step
+        # Boxes are identified by their left half
+        if cells[target] == BOX_LEFT:
+            should_move = move_boxes_wide_warehouse(grid, target, step)
+        elif cells[target] == BOX_RIGHT:
+            should_move = move_boxes_wide_warehouse(grid, target - 1, step)
+        elif cells[target] == WALL:
             should_move = False
         else:
             # Empty space
             should_move = True
         if should_move:
             robot = target
-    return robot, boxes
+    return robot, grid
 
 
-def move_boxes_wide_warehouse(
-    boxes: set[tuple[int, int]],
-    walls: set[tuple[int, int]],
-    origin: tuple[int, int],
-    step: tuple[int, int],
-) -> bool:
+def move_boxes_wide_warehouse(grid: Grid, origin: int, step: int) -> bool:
     box_moved = False
-    match step:
-        case (0, -1):
-            box_moved = move_wide_boxes_left(boxes, walls, origin)
-        case (0, 1):
-            box_moved = move_wide_boxes_right(boxes, walls, origin)
-        case _:
-            if box_moved := can_move_wide_boxes_vertically(
-                boxes, walls, origin, step[0]
-            ):
-                move_wide_boxes_vertically(boxes, walls, origin, step[0])
+    if step == grid.left:
+        box_moved = move_wide_boxes_left(grid, origin)
+    elif step == grid.right:
+        box_moved = move_wide_boxes_right(grid, origin)
+    elif box_moved := can_move_wide_boxes_vertically(grid, origin, step):
+        move_wide_boxes_vertically(grid, origin, step)
     return box_moved
 
 
-def move_wide_boxes_left(
-    boxes: set[tuple[int, int]], walls: set[tuple[int, int]], origin: tuple[int, int]
-) -> bool:
+def move_wide_boxes_left(grid: Grid, origin: int) -> bool:
+    cells = grid.cells
     box_moved = False
-    target = (origin[0], origin[1] - 1)
-    left_target = (target[0], target[1] - 1)
-    if left_target in boxes:
-        move_wide_boxes_left(boxes, walls, left_target)
-    if target not in walls and left_target not in boxes:
-        boxes.remove(origin)
-        boxes.add(target)
+    target = origin - 1
+    left_target = target - 1
+    if cells[left_target] == BOX_LEFT:
+        move_wide_boxes_left(grid, left_target)
+    if cells[target] != WALL and cells[left_target] != BOX_LEFT:
+        cells[target] = BOX_LEFT
+        cells[origin] = BOX_RIGHT
+        cells[origin + 1] = EMPTY
         box_moved = True
     return box_moved
 
 
-def move_wide_boxes_right(
-    boxes: set[tuple[int, int]], walls: set[tuple[int, int]], origin: tuple[int, int]
-) -> bool:
+def move_wide_boxes_right(grid: Grid, origin: int) -> bool:
+    cells = grid.cells
     box_moved = False
-    target = (origin[0], origin[1] + 1)
-    right_target = (target[0], target[1] + 1)
-    if right_target in boxes:
-        move_wide_boxes_right(boxes, walls, right_target)
-    if right_target not in walls and right_target not in boxes:
-        boxes.remove(origin)
-        boxes.add(target)
+    target = origin + 1
+    right_target = target + 1
+    if cells[right_target] == BOX_LEFT:
+        move_wide_boxes_right(grid, right_target)
+    if cells[right_target] != WALL and cells[right_target] != BOX_LEFT:
+        cells[origin] = EMPTY
+        cells[target] = BOX_LEFT
+        cells[right_target] = BOX_RIGHT
         box_moved = True
     return box_moved
 
 
-def move_wide_boxes_vertically(
-    boxes: set[tuple[int, int]],
-    walls: set[tuple[int, int]],
-    origin: tuple[int, int],
-    vert_step: int,
-) -> None:
-    target = (origin[0] + vert_step, origin[1])
-    left_target = (target[0], target[1] - 1)
-    right_target = (target[0], target[1] + 1)
-    if left_target in boxes:
-        move_wide_boxes_vertically(boxes, walls, left_target, vert_step)
-    if target in boxes:
-        move_wide_boxes_vertically(boxes, walls, target, vert_step)
-    if right_target in boxes:
-        move_wide_boxes_vertically(boxes, walls, right_target, vert_step)
-    boxes.remove(origin)
-    boxes.add(target)
-
-
-def can_move_wide_boxes_vertically(
-    boxes: set[tuple[int, int]],
-    walls: set[tuple[int, int]],
-    origin: tuple[int, int],
-    vert_step: int,
-) -> bool:
+def move_wide_boxes_vertically(grid: Grid, origin: int, vert_step: int) -> None:
+    cells = grid.cells
+    target = origin + vert_step
+    left_target = target - 1
+    right_target = target + 1
+    if cells[left_target] == BOX_LEFT:
+        move_wide_boxes_vertically(grid, left_target, vert_step)
+    if cells[target] == BOX_LEFT:
+        move_wide_boxes_vertically(grid, target, vert_step)
+    if cells[right_target] == BOX_LEFT:
+        move_wide_boxes_vertically(grid, right_target, vert_step)
+    cells[origin] = EMPTY
+    cells[origin + 1] = EMPTY
+    cells[target] = BOX_LEFT
+    cells[right_target] = BOX_RIGHT
+
+
+def can_move_wide_boxes_vertically(grid: Grid, origin: int, vert_step: int) -> bool:
+    cells = grid.cells
     can_move = True
-    target = (origin[0] + vert_step, origin[1])
-    left_target = (target[0], target[1] - 1)
-    right_target = (target[0], target[1] + 1)
-    if left_target in boxes:
-        can_move &= can_move_wide_boxes_vertically(boxes, walls, left_target, vert_step)
-    if target in boxes:
-        can_move &= can_move_wide_boxes_vertically(boxes, walls, target, vert_step)
-    if right_target in boxes:
-        can_move &= can_move_wide_boxes_vertically(
-            boxes, walls, right_target, vert_step
-        )
-    can_move &= target not in walls and right_target not in walls
+    target = origin + vert_step
+    left_target = target - 1
+    right_target = target + 1
+    if cells[left_target] == BOX_LEFT:
+        can_move &= can_move_wide_boxes_vertically(grid, left_target, vert_step)
+    if cells[target] == BOX_LEFT:
+        can_move &= can_move_wide_boxes_vertically(grid, target, vert_step)
+    if cells[right_target] == BOX_LEFT:
+        can_move &= can_move_wide_boxes_vertically(grid, right_target, vert_step)
+    can_move &= cells[target] != WALL and cells[right_target] != WALL
     return can_move
 
 
-def format_normal_warehouse(robot, boxes, walls):
-    rows = (
-        max(robot[0], max(box[0] for box in boxes), max(wall[0] for wall in walls)) + 1
-    )
-    cols = (
-        max(robot[1], max(box[1] for box in boxes), max(wall[1] for wall in walls)) + 1
-    )
-    lines = []
-    for row in range(rows):
-        line = []
-        for col in range(cols):
-            pos = (row, col)
-            if pos == robot:
-                line.append("@")
-            elif pos in boxes:
-                line.append("O")
-            elif pos in walls:
-                line.append("#")
-            else:
-                line.append(".")
-        lines.append("".join(l for l in line))
-    return "\n".join(lines)
-
-
-def format_wide_warehouse(robot, boxes, walls):
-    rows = (
-        max(robot[0], max(box[0] for box in boxes), max(wall[0] for wall in walls)) + 1
-    )
-    cols = (
-        max(robot[1], max(box[1] for box in boxes), max(wall[1] for wall in walls)) + 1
-    )
-    lines = []
-    for row in range(rows):
-        line = []
-        col = 0
-        while col < cols:
-            pos = (row, col)
-            if pos == robot:
-                line.append("@")
-            elif pos in boxes:
-                line.append("[]")
-                col += 1
-            elif pos in walls:
-                line.append("##")
-                col += 1
-            else:
-                line.append(".")
-            col += 1
-        lines.append("".join(l for l in line))
-    return "\n".join(lines)
+def format_warehouse(grid: Grid, robot: int) -> str:
+    with_robot = grid.copy()
+    with_robot[robot] = ROBOT
+    return "\n".join(with_robot.to_lines())
+
+
+def parse(source: os.PathLike) -> tuple[Grid, int, str]:
+    return read_input(source)
+
+
+def part1(state: tuple[Grid, int, str]) -> int:
+    # Moving the boxes modifies the grid
+    grid, robot, moves = state
+    _, grid = make_moves(grid.copy(), robot, moves)
+    return calc_sum_of_gps(grid)
+
+
+def part2(state: tuple[Grid, int, str]) -> int:
+    grid, robot, moves = state
+    wide_grid, wide_robot = convert_to_wide_warehouse(grid, robot)
+    _, wide_grid = make_moves_wide_warehouse(wide_grid, wide_robot, moves)
+    return calc_sum_of_gps(wide_grid)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    robot, boxes, walls, moves = read_input(input_file)
-    wide_robot, wide_boxes, wide_walls = convert_to_wide_warehouse(robot, boxes, walls)
-    robot, boxes = make_moves(robot, boxes, walls, moves)
-    sum_of_gps = calc_sum_of_gps(boxes)
-    print(f"Day 15, Part 1: {sum_of_gps}")
-    wide_robot, wide_boxes = make_moves_wide_warehouse(
-        wide_robot, wide_boxes, wide_walls, moves
-    )
-    sum_of_gps_wide_warehouse = calc_sum_of_gps(wide_boxes)
-    print(f"Day 15, Part 2: {sum_of_gps_wide_warehouse}")
+    if args.input_dir is not None:
+        batch.run(args, 15)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 15)
+            state = answer_cache.lazy(parse, args.input)
+            sum_of_gps = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 15, Part 1: {sum_of_gps}")
+            sum_of_gps_wide_warehouse = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 15, Part 2: {sum_of_gps_wide_warehouse}")
@@ -1,105 +1,120 @@
 import argparse
-import heapq
 import os
+from array import array
+
+import answer_cache
+import batch
+import input_stream
+import profiling
+import shortest_paths
+from grid import Grid
+
+WALL = ord("#")
 
 
 def read_input(
     input_file: os.PathLike,
-) -> tuple[tuple[int, int], tuple[int, int], set[tuple[int, int]]]:
-    walls = set()
-    with open(input_file, "r") as f:
-        for row, line in enumerate(f):
-            for col, char in enumerate(line.strip("\n")):
-                match char:
-                    case "S":
-                        start = (row, col)
-                    case "E":
-                        end = (row, col)
-                    case "#":
-                        walls.add((row, col))
-                    case _:
-                        pass
-    return start, end, walls
-
-
-def find_lowest_score(
-    start: tuple[int, int], end: tuple[int, int], walls: set[tuple[int, int]]
-) -> tuple[dict, dict]:
-    # Nodes: ((row, col), axis), with axis: 0 vertical, 1 horizontal
-    start_with_axis = (start, 1)
-    score = {start_with_axis: 0}
-    came_from = {start: set()}
-    frontier = [(score[start_with_axis], start_with_axis)]
-    while frontier:
-        _, current = heapq.heappop(frontier)
-        if (current[0][0], current[0][1]) == end:
-            break
-        for neighbor in get_neighbors(current, walls):
-            new_score = score[current] + 1 + (neighbor[1] ^ current[1]) * 1000
-            if neighbor in score and new_score == score[neighbor]:
-                came_from[neighbor] = came_from.get(neighbor, set()) | {current}
-            if neighbor not in score or new_score < score[neighbor]:
-                score[neighbor] = new_score
-                came_from[neighbor] = {current}
-                heapq.heappush(frontier, (score[neighbor], neighbor))
-    return score, came_from
-
-
-def get_neighbors(
-    tile: tuple[tuple[int, int], int], walls: set[tuple[int, int]]
-) -> list[tuple[tuple[int, int], int]]:
-    row = tile[0][0]
-    col = tile[0][1]
+) -> tuple[int, int, Grid]:
+    with input_stream.open_input(input_file) as f:
+        grid = Grid.from_lines(f)
+    start = grid.find(ord("S"))
+    end = grid.find(ord("E"))
+    return start, end, grid
+
+
+def find_lowest_score(start: int, end: int, grid: Grid) -> tuple[array, list]:
+    # Nodes: 2 * square + axis, with axis: 0 vertical, 1 horizontal
+    def edges(node: int) -> list[tuple[int, int]]:
+        square, axis = divmod(node, 2)
+        return [
+            (2 * neighbor + neighbor_axis, 1 + (neighbor_axis ^ axis) * 1000)
+            for neighbor, neighbor_axis in get_neighbors(square, grid)
+        ]
+
+    paths = shortest_paths.search(
+        2 * len(grid.cells),
+        [2 * start + 1],
+        edges,
+        weights=(1, 1001),
+        targets=(2 * end, 2 * end + 1),
+        predecessors=True,
+    )
+    return paths.distance, paths.predecessors
+
+
+def get_neighbors(square: int, grid: Grid) -> list[tuple[int, int]]:
+    # The maze is surrounded by walls, so we never leave the grid
     neighbors = []
-    top = (row - 1, col)
-    if top not in walls:
+    top = square + grid.up
+    if grid.cells[top] != WALL:
         neighbors.append((top, 0))
-    right = (row, col + 1)
-    if right not in walls:
+    right = square + grid.right
+    if grid.cells[right] != WALL:
         neighbors.append((right, 1))
-    bottom = (row + 1, col)
-    if bottom not in walls:
+    bottom = square + grid.down
+    if grid.cells[bottom] != WALL:
         neighbors.append((bottom, 0))
-    left = (row, col - 1)
-    if left not in walls:
+    left = square + grid.left
+    if grid.cells[left] != WALL:
         neighbors.append((left, 1))
     return neighbors
 
 
-def tiles_on_best_paths(
-    score: dict, came_from: dict, start: tuple[int, int], end: tuple[int, int]
-) -> set[tuple[int, int]]:
-    if (end, 0) not in score:
-        to_visit = [(end, 1)]
-    elif (end, 1) not in score:
-        to_visit = [(end, 0)]
-    elif score[(end, 0)] < score[(end, 1)]:
-        to_visit = [(end, 0)]
-    elif score[(end, 0)] > score[(end, 1)]:
-        to_visit = [(end, 1)]
-    elif score[(end, 0)] == score[(end, 1)]:
-        to_visit = [(end, 0), (end, 1)]
+def lowest_end_score(score: array, end: int) -> int | None:
+    end_score = min(score[2 * end], score[2 * end + 1])
+    return None if end_score == shortest_paths.UNREACHED else end_score
+
+
+def tiles_on_best_paths(score: array, came_from: list, end: int) -> set[int]:
+    end_score = lowest_end_score(score, end)
+    to_visit = [node for node in (2 * end, 2 * end + 1) if score[node] == end_score]
     best_paths = {end}
     visited = set()
     while to_visit:
         current = to_visit.pop()
         if current in visited:
             continue
-        prev = came_from.get(current, set())
-        best_paths |= {p[0] for p in prev}
+        prev = came_from[current]
+        best_paths |= {p // 2 for p in prev}
         to_visit.extend(prev)
         visited.add(current)
     return best_paths
 
 
+def parse(source: os.PathLike) -> tuple[int, int, Grid]:
+    return read_input(source)
+
+
+def solve(state: tuple[int, int, Grid]) -> tuple[int, int]:
+    start, end, grid = state
+    score, came_from = find_lowest_score(start, end, grid)
+    best_paths = tiles_on_best_paths(score, came_from, end)
+    return lowest_end_score(score, end), len(best_paths)
+
+
+def part1(state: tuple[int, int, Grid]) -> int:
+    return solve(state)[0]
+
+
+def part2(state: tuple[int, int, Grid]) -> int:
+    return solve(state)[1]
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    start, end, walls = read_input(input_file)
-    score, came_from = find_lowest_score(start, end, walls)
-    end_score = score.get((end, 0), score.get((end, 1), None))
-    best_paths = tiles_on_best_paths(score, came_from, start, end)
-    print(f"Day 16, Part 1: {end_score}")
-    print(f"Day 16, Part 2: {len(best_paths)}")
+    if args.input_dir is not None:
+        batch.run(args, 16)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 16)
+            state = answer_cache.lazy(parse, args.input)
+            end_score, best_path_tiles = cache.get_or_compute_all(
+                (1, 2), lambda: solve(state())
+            )
+            print(f"Day 16, Part 1: {end_score}")
+            print(f"Day 16, Part 2: {best_path_tiles}")
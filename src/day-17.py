@@ -1,11 +1,16 @@
 import argparse
 import os
 
+import answer_cache
+import batch
+import input_stream
+import profiling
+
 
 def read_input(
     input_file: os.PathLike,
 ) -> tuple[int, int, int, list[int]]:
-    with open(input_file, "r") as f:
+    with input_stream.open_input(input_file) as f:
         reg_a = int(f.readline().strip("\n").removeprefix("Register A: "))
         reg_b = int(f.readline().strip("\n").removeprefix("Register B: "))
         reg_c = int(f.readline().strip("\n").removeprefix("Register C: "))
@@ -113,13 +118,32 @@ def combo(operand: int, reg_a: int, reg_b: int, reg_c: int) -> int:
             return operand
 
 
+def parse(source: os.PathLike) -> tuple[int, int, int, list[int]]:
+    return read_input(source)
+
+
+def part1(state: tuple[int, int, int, list[int]]) -> str:
+    return ",".join(f"{o}" for o in run_program(*state))
+
+
+def part2(state: tuple[int, int, int, list[int]]) -> int:
+    return min(find_self_producing(*state[1:]))
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    reg_a, reg_b, reg_c, program = read_input(input_file)
-    output = run_program(reg_a, reg_b, reg_c, program)
-    initial_a = find_self_producing(reg_b, reg_c, program)
-    print(f"Day 17, Part 1: {",".join(f"{o}" for o in output)}")
-    print(f"Day 17, Part 2: {min(initial_a)}")
+    if args.input_dir is not None:
+        batch.run(args, 17)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 17)
+            state = answer_cache.lazy(parse, args.input)
+            output = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 17, Part 1: {output}")
+            initial_a = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 17, Part 2: {initial_a}")
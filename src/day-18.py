@@ -1,85 +1,98 @@
 import argparse
-import heapq
 import os
 
+import answer_cache
+import batch
+import int_reader
+import profiling
+import shortest_paths
+from grid import Grid
+
+# Squares that are never blocked. The padding around the grid is blocked from
+# the start.
+NEVER = 2**31 - 1
+ALWAYS = -1
+
+GRID_SIZE = (71, 71)
+
 
 def read_input(
-    input_file: os.PathLike,
-) -> list[tuple[int, int]]:
-    blocked = []
-    with open(input_file, "r") as f:
-        for line in f:
-            blocked.append(tuple(int(n) for n in line.strip("\n").split(",")))
-    return blocked
-
-
-def shortest_path(
-    start: tuple[int, int],
-    end: tuple[int, int],
-    blocked: set[tuple[int, int]],
-    grid_size: tuple[int, int],
-) -> int | None:
-    # Dijkstra's algorithm
-    steps = {start: 0}
-    current = start
-    frontier = [(steps[current], current)]
-    while frontier:
-        current_steps, current = heapq.heappop(frontier)
-        if current == end:
-            break
-        for neighbor in get_neighbors(current):
-            if is_within_bounds(neighbor, grid_size) and neighbor not in blocked:
-                neighbor_steps = current_steps + 1
-                if neighbor not in steps or neighbor_steps < steps[neighbor]:
-                    steps[neighbor] = neighbor_steps
-                    heapq.heappush(frontier, (neighbor_steps, neighbor))
-    return steps.get(end, None)
+    input_file: os.PathLike, grid_size: tuple[int, int]
+) -> tuple[list[tuple[int, int]], Grid]:
+    numbers = int_reader.read_ints(input_file)
+    blocked = list(zip(numbers[0::2], numbers[1::2]))
+    # Store the time at which each square gets blocked, so that the state
+    # after any number of fallen bytes can be checked without building a new
+    # set of blocked squares
+    fall_time = Grid(*grid_size, fill=NEVER, border=ALWAYS, typecode="i")
+    for time, square in reversed(list(enumerate(blocked))):
+        fall_time[fall_time.index(*square)] = time
+    return blocked, fall_time
+
+
+def shortest_path(start: int, end: int, fall_time: Grid, fallen: int) -> int | None:
+    # Squares are blocked if their byte has already fallen
+    edges = shortest_paths.grid_edges(
+        fall_time.cells, fall_time.directions, lambda time: time >= fallen
+    )
+    paths = shortest_paths.search(
+        len(fall_time.cells), [start], edges, weights=(1,), targets=(end,)
+    )
+    steps = paths.distance[end]
+    return None if steps == shortest_paths.UNREACHED else steps
 
 
 def find_first_preventing(
-    start: tuple[int, int],
-    end: tuple[int, int],
-    blocked: set[tuple[int, int]],
-    grid_size: tuple[int, int],
+    start: int,
+    end: int,
+    blocked: list[tuple[int, int]],
+    fall_time: Grid,
 ) -> tuple[int, int]:
     # Binary search
     lo = 0
     hi = len(blocked)
     while lo < hi - 1:
         mid = lo + (hi - lo) // 2
-        first_n_blocked = set(blocked[:mid])
-        if shortest_path(start, end, first_n_blocked, grid_size) is None:
+        if shortest_path(start, end, fall_time, mid) is None:
             hi = mid
         else:
             lo = mid
     return blocked[lo]
 
 
-def get_neighbors(square: tuple[int, int]) -> tuple[tuple[int, int]]:
-    row = square[0]
-    col = square[1]
-    top = (row - 1, col)
-    right = (row, col + 1)
-    bottom = (row + 1, col)
-    left = (row, col - 1)
-    return top, right, bottom, left
+def parse(source: os.PathLike) -> tuple[list[tuple[int, int]], Grid]:
+    return read_input(source, GRID_SIZE)
+
+
+def part1(state: tuple[list[tuple[int, int]], Grid]) -> int:
+    _, fall_time = state
+    start = fall_time.index(0, 0)
+    end = fall_time.index(fall_time.height - 1, fall_time.width - 1)
+    return shortest_path(start, end, fall_time, 1024)
 
 
-def is_within_bounds(square: tuple[int, int], grid_size: tuple[int, int]) -> bool:
-    return 0 <= square[0] < grid_size[0] and 0 <= square[1] < grid_size[1]
+def part2(state: tuple[list[tuple[int, int]], Grid]) -> str:
+    blocked, fall_time = state
+    start = fall_time.index(0, 0)
+    end = fall_time.index(fall_time.height - 1, fall_time.width - 1)
+    first_preventing = find_first_preventing(start, end, blocked, fall_time)
+    return ",".join(f"{n}" for n in first_preventing)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    blocked = read_input(input_file)
-    grid_size = (71, 71)
-    first_1024_blocked = set(blocked[:1024])
-    start = (0, 0)
-    end = (grid_size[0] - 1, grid_size[1] - 1)
-    steps_to_end = shortest_path(start, end, first_1024_blocked, grid_size)
-    first_preventing = find_first_preventing(start, end, blocked, grid_size)
-    print(f"Day 18, Part 1: {steps_to_end}")
-    print(f"Day 18, Part 2: {",".join(f"{n}" for n in first_preventing)}")
+    if args.input_dir is not None:
+        batch.run(args, 18)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 18)
+            state = answer_cache.lazy(parse, args.input)
+            steps_to_end = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 18, Part 1: {steps_to_end}")
+            first_preventing = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 18, Part 2: {first_preventing}")
@@ -1,12 +1,19 @@
 import argparse
+import functools
 import os
 
+import answer_cache
+import batch
+import counters
+import input_stream
+import profiling
+
 
 def read_input(
     input_file: os.PathLike,
 ) -> tuple[list[str], list[str]]:
     desired = []
-    with open(input_file, "r") as f:
+    with input_stream.open_input(input_file) as f:
         available = list(f.readline().strip("\n").split(", "))
         f.readline()
         while (line := f.readline().strip("\n")) != "":
@@ -14,27 +21,42 @@ def read_input(
     return available, desired
 
 
-def count_possible(available: set[str], desired: list[str]) -> tuple[int, int]:
-    possibility_count = init_possibilities(available)
+def count_possible(available: list[str], desired: list[str]) -> tuple[int, int]:
+    available = frozenset(available)
+    # The patterns counted for these designs are only kept during the call
+    possibility_count = counters.cache(
+        "count_possibilities", dict(towel_index(available))
+    )
     possible_pattern_count = 0
     possible_combination_count = 0
     for d in desired:
-        count = count_possibilities(set(available), possibility_count, d)
+        count = count_possibilities(available, possibility_count, d)
         possible_pattern_count += 1 if count > 0 else 0
         possible_combination_count += count
     return possible_pattern_count, possible_combination_count
 
 
-def init_possibilities(available: list[str]) -> dict:
+@functools.lru_cache(maxsize=8)
+def towel_index(available: frozenset[str]) -> dict:
+    # The counts of the towels themselves, shared by inputs with the same
+    # towels. Callers count their designs in a copy, so the table doesn't grow.
+    return init_possibilities(available)
+
+
+def init_possibilities(available: frozenset[str]) -> dict:
     possibility_count = {}
+    # towel_index keeps the plain dict
+    counted = counters.cache("count_possibilities", possibility_count)
     sorted_available = sorted(available, key=lambda a: len(a))
     for sa in sorted_available:
-        possibility_count[sa] = 1 + count_possibilities(
-            set(available), possibility_count, sa
-        )
+        possibility_count[sa] = 1 + count_possibilities(available, counted, sa)
     return possibility_count
 
 
+def clear_tables() -> None:
+    towel_index.cache_clear()
+
+
 def count_possibilities(
     available: set[str], possibility_count: dict, pattern: str
 ) -> int:
@@ -50,14 +72,37 @@ def count_possibilities(
     return count
 
 
+def parse(source: os.PathLike) -> tuple[list[str], list[str]]:
+    return read_input(source)
+
+
+def solve(state: tuple[list[str], list[str]]) -> tuple[int, int]:
+    return count_possible(*state)
+
+
+def part1(state: tuple[list[str], list[str]]) -> int:
+    return solve(state)[0]
+
+
+def part2(state: tuple[list[str], list[str]]) -> int:
+    return solve(state)[1]
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    available, desired = read_input(input_file)
-    possible_pattern_count, possible_combination_count = count_possible(
-        available, desired
-    )
-    print(f"Day 19, Part 1: {possible_pattern_count}")
-    print(f"Day 19, Part 2: {possible_combination_count}")
+    if args.input_dir is not None:
+        batch.run(args, 19)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 19)
+            state = answer_cache.lazy(parse, args.input)
+            possible_pattern_count, possible_combination_count = (
+                cache.get_or_compute_all((1, 2), lambda: solve(state()))
+            )
+            print(f"Day 19, Part 1: {possible_pattern_count}")
+            print(f"Day 19, Part 2: {possible_combination_count}")
@@ -1,6 +1,12 @@
 import argparse
 import os
 
+import answer_cache
+import batch
+import counters
+import input_stream
+import profiling
+
 NUMERIC_KEYPAD = {
     "7": (0, 0),
     "8": (0, 1),
@@ -26,19 +32,23 @@ DIRECTIONAL_KEYPAD = {
     ">": (1, 2),
 }
 
+# Shortest sequence lengths on the directional keypads, keyed by (sequence,
+# levels). They don't depend on the codes, so they're shared by all codes and
+# inputs.
+DIRECTIONAL_LENGTHS = {}
+
 
 def read_input(
     input_file: os.PathLike,
 ) -> list[str]:
     codes = []
-    with open(input_file, "r") as f:
+    with input_stream.open_input(input_file) as f:
         for line in f:
             codes.append(line.strip("\n"))
     return codes
 
 
-def complexity(code: str, levels: int) -> int:
-    cache = {}
+def complexity(code: str, levels: int, cache: dict) -> int:
     seq_len = shortest_sequence_length(code, NUMERIC_KEYPAD, levels, cache)
     numeric_part = int(code.strip("A"))
     return seq_len * numeric_part
@@ -88,13 +98,41 @@ def next_char_sequence(origin: str, target: str, keypad: dict) -> list[str]:
     return sequences
 
 
+def parse(source: os.PathLike) -> list[str]:
+    return read_input(source)
+
+
+def sum_of_complexities(codes: list[str], levels: int) -> int:
+    cache = counters.cache("shortest_sequence_length", DIRECTIONAL_LENGTHS)
+    return sum(complexity(code, levels, cache) for code in codes)
+
+
+def clear_tables() -> None:
+    DIRECTIONAL_LENGTHS.clear()
+
+
+def part1(state: list[str]) -> int:
+    return sum_of_complexities(state, 3)
+
+
+def part2(state: list[str]) -> int:
+    return sum_of_complexities(state, 26)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    codes = read_input(input_file)
-    sum_of_complexities_3 = sum(complexity(code, 3) for code in codes)
-    print(f"Day 21, Part 1: {sum_of_complexities_3}")
-    sum_of_complexities_26 = sum(complexity(code, 26) for code in codes)
-    print(f"Day 21, Part 2: {sum_of_complexities_26}")
+    if args.input_dir is not None:
+        batch.run(args, 21)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 21)
+            state = answer_cache.lazy(parse, args.input)
+            sum_of_complexities_3 = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 21, Part 1: {sum_of_complexities_3}")
+            sum_of_complexities_26 = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 21, Part 2: {sum_of_complexities_26}")
@@ -2,15 +2,16 @@ import argparse
 import collections
 import os
 
+import answer_cache
+import batch
+import int_reader
+import profiling
+
 
 def read_input(
     input_file: os.PathLike,
 ) -> list[int]:
-    numbers = []
-    with open(input_file, "r") as f:
-        for line in f:
-            numbers.append(int(line.strip("\n")))
-    return numbers
+    return int_reader.read_ints(input_file)
 
 
 def calc_sum_of_secret_numbers_and_max_bananas(
@@ -44,6 +45,7 @@ def calc_sum_of_secret_numbers_and_max_bananas(
     return sum_of_secret_numbers, max_bananas
 
 
+@profiling.hot
 def next_secret_number(number: int) -> int:
     number ^= number * 64
     number %= 16777216
@@ -54,16 +56,37 @@ def next_secret_number(number: int) -> int:
     return number
 
 
+def parse(source: os.PathLike) -> list[int]:
+    return read_input(source)
+
+
+def solve(state: list[int]) -> tuple[int, int]:
+    return calc_sum_of_secret_numbers_and_max_bananas(state, 2000, 4)
+
+
+def part1(state: list[int]) -> int:
+    return solve(state)[0]
+
+
+def part2(state: list[int]) -> int:
+    return solve(state)[1]
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    initial_numbers = read_input(input_file)
-    generated_numbers_count = 2000
-    sequence_len = 4
-    sum_of_secret_numbers, max_bananas = calc_sum_of_secret_numbers_and_max_bananas(
-        initial_numbers, generated_numbers_count, sequence_len
-    )
-    print(f"Day 22, Part 1: {sum_of_secret_numbers}")
-    print(f"Day 22, Part 2: {max_bananas}")
+    if args.input_dir is not None:
+        batch.run(args, 22)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 22)
+            state = answer_cache.lazy(parse, args.input)
+            sum_of_secret_numbers, max_bananas = cache.get_or_compute_all(
+                (1, 2), lambda: solve(state())
+            )
+            print(f"Day 22, Part 1: {sum_of_secret_numbers}")
+            print(f"Day 22, Part 2: {max_bananas}")
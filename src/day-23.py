@@ -1,12 +1,18 @@
 import argparse
 import os
 
+import answer_cache
+import batch
+import counters
+import input_stream
+import profiling
+
 
 def read_input(
     input_file: os.PathLike,
 ) -> dict:
     connections = {}
-    with open(input_file, "r") as f:
+    with input_stream.open_input(input_file) as f:
         for line in f:
             comp1, comp2 = line.strip("\n").split("-")
             connections[comp1] = connections.get(comp1, set()) | {comp2}
@@ -35,6 +41,8 @@ def find_maximal_cliques(connections: dict) -> list[set[str]]:
     return max_cliques
 
 
+@counters.counted("bron_kerbosch calls")
+@profiling.hot
 def bron_kerbosch(
     connections: dict,
     max_cliques: list[set[str]],
@@ -68,14 +76,32 @@ def get_password(sets: list[set[str]]) -> str:
     return password
 
 
+def parse(source: os.PathLike) -> dict:
+    return read_input(source)
+
+
+def part1(state: dict) -> int:
+    return len(get_sets_of_three_startswith_t(state))
+
+
+def part2(state: dict) -> str:
+    return get_password(find_maximal_cliques(state))
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    connections = read_input(input_file)
-    sets_of_three = get_sets_of_three_startswith_t(connections)
-    print(f"Day 23, Part 1: {len(sets_of_three)}")
-    max_cliques = find_maximal_cliques(connections)
-    password = get_password(max_cliques)
-    print(f"Day 23, Part 2: {password}")
+    if args.input_dir is not None:
+        batch.run(args, 23)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 23)
+            state = answer_cache.lazy(parse, args.input)
+            sets_of_three = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 23, Part 1: {sets_of_three}")
+            password = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 23, Part 2: {password}")
@@ -1,6 +1,11 @@
 import argparse
 import os
 
+import answer_cache
+import batch
+import input_stream
+import profiling
+
 type Gate = tuple[str, str, str, str]
 
 
@@ -9,7 +14,7 @@ def read_input(
 ) -> tuple[dict, list[Gate]]:
     initial_values = {}
     gates = []
-    with open(input_file, "r") as f:
+    with input_stream.open_input(input_file) as f:
         # Read the first section of the input until the blank line
         # (initial wire values)
         while (line := f.readline().strip("\n")) != "":
@@ -194,15 +199,34 @@ def find_gate(
     return None
 
 
+def parse(source: os.PathLike) -> tuple[dict, list[Gate]]:
+    return read_input(source)
+
+
+def part1(state: tuple[dict, list[Gate]]) -> int:
+    return get_output(process_all_gates(*state), "z")
+
+
+def part2(state: tuple[dict, list[Gate]]) -> str:
+    _, gates = state
+    swapped = detect_swapped(gates)
+    return ",".join(sorted(elem for pair in swapped for elem in pair))
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    initial_values, gates = read_input(input_file)
-    values = process_all_gates(initial_values, gates)
-    output = get_output(values, "z")
-    print(f"Day 24, Part 1: {output}")
-    swapped = detect_swapped(gates)
-    password = ",".join(sorted(elem for pair in swapped for elem in pair))
-    print(f"Day 24, Part 2: {password}")
+    if args.input_dir is not None:
+        batch.run(args, 24)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 24)
+            state = answer_cache.lazy(parse, args.input)
+            output = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 24, Part 1: {output}")
+            password = cache.get_or_compute(2, lambda: part2(state()))
+            print(f"Day 24, Part 2: {password}")
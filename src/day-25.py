@@ -1,13 +1,18 @@
 import argparse
 import os
 
+import answer_cache
+import batch
+import input_stream
+import profiling
+
 
 def read_input(
     input_file: os.PathLike,
 ) -> tuple[list[tuple[int]], list[tuple[int]]]:
     locks = []
     keys = []
-    with open(input_file, "r") as f:
+    with input_stream.open_input(input_file) as f:
         while (line := f.readline().strip("\n")) != "":
             if line[0] == "#":
                 # Read lock
@@ -35,11 +40,27 @@ def fits_together(lock: tuple[int], key: tuple[int]) -> bool:
     return all(l + k <= 5 for l, k in zip(lock, key))
 
 
+def parse(source: os.PathLike) -> tuple[list[tuple[int]], list[tuple[int]]]:
+    return read_input(source)
+
+
+def part1(state: tuple[list[tuple[int]], list[tuple[int]]]) -> int:
+    locks, keys = state
+    return sum(int(fits_together(lock, key)) for lock in locks for key in keys)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str)
+    profiling.add_arguments(parser)
+    answer_cache.add_arguments(parser)
+    batch.add_arguments(parser)
     args = parser.parse_args()
-    input_file = args.input
-    locks, keys = read_input(input_file)
-    pair_count = sum(int(fits_together(lock, key)) for lock in locks for key in keys)
-    print(f"Day 25, Part 1: {pair_count}")
+    if args.input_dir is not None:
+        batch.run(args, 25)
+    else:
+        with profiling.session(args):
+            cache = answer_cache.from_args(args, 25)
+            state = answer_cache.lazy(parse, args.input)
+            pair_count = cache.get_or_compute(1, lambda: part1(state()))
+            print(f"Day 25, Part 1: {pair_count}")
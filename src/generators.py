@@ -0,0 +1,554 @@
+import argparse
+import itertools
+import math
+import os
+import random
+import string
+import sys
+from typing import Callable, Iterator
+
+# Every generator yields the input text in pieces (usually one line at a time,
+# including the newline), so arbitrarily large inputs can be streamed to a file
+# without holding them in memory.
+#
+# Count based generators take (rng, size), grid based ones (rng, height, width).
+
+
+def generate_day_01(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of lines (location ID pairs)
+    for _ in range(size):
+        yield f"{rng.randrange(10000, 100000)}   {rng.randrange(10000, 100000)}\n"
+
+
+def generate_day_02(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of reports
+    for _ in range(size):
+        level = rng.randrange(30, 70)
+        direction = rng.choice((-1, 1))
+        levels = [level]
+        for _ in range(rng.randrange(4, 8)):
+            if rng.random() < 0.05:
+                # Unsafe step: no change, too large or wrong direction
+                step = rng.choice((0, 4 * direction, -direction))
+            else:
+                step = rng.randrange(1, 4) * direction
+            level += step
+            levels.append(level)
+        yield " ".join(str(level) for level in levels) + "\n"
+
+
+def generate_day_03(rng: random.Random, size: int) -> Iterator[str]:
+    # size: approximate number of characters
+    junk = "!@#$%^&*()[]{}<>,;:'+-? selectwhyhowfromwhatwhere"
+    line_length = 3000
+    written = 0
+    while written < size:
+        tokens = []
+        length = 0
+        while length < min(line_length, size - written):
+            match rng.randrange(10):
+                case 0 | 1 | 2:
+                    token = f"mul({rng.randrange(1, 1000)},{rng.randrange(1, 1000)})"
+                case 3:
+                    # Corrupted instruction
+                    token = rng.choice(
+                        ("mul(4*", "mul[3,7]", "mul ( 2 , 4 )", "mul(6,9!")
+                    )
+                case 4:
+                    token = rng.choice(("do()", "don't()"))
+                case _:
+                    token = "".join(rng.choices(junk, k=rng.randrange(1, 8)))
+            tokens.append(token)
+            length += len(token)
+        written += length
+        yield "".join(tokens) + "\n"
+
+
+def generate_day_04(rng: random.Random, height: int, width: int) -> Iterator[str]:
+    for _ in range(height):
+        yield "".join(rng.choices("XMAS", k=width)) + "\n"
+
+
+def generate_day_05(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of updates
+    # The rules order the pages in a circle: each page comes before the next
+    # half of the circle. Pages from within a window of half the circle are
+    # therefore totally ordered, so every update can be fixed.
+    page_count = 49
+    half = page_count // 2
+    pages = rng.sample(range(10, 100), page_count)
+    rules = [
+        (pages[i], pages[(i + offset) % page_count])
+        for i in range(page_count)
+        for offset in range(1, half + 1)
+    ]
+    rng.shuffle(rules)
+    for a, b in rules:
+        yield f"{a}|{b}\n"
+    yield "\n"
+    for _ in range(size):
+        first = rng.randrange(page_count)
+        window = [pages[(first + offset) % page_count] for offset in range(half + 1)]
+        length = rng.randrange(2, 12) * 2 + 1
+        indices = sorted(rng.sample(range(len(window)), length))
+        update = [window[idx] for idx in indices]
+        if rng.random() < 0.5:
+            rng.shuffle(update)
+        yield ",".join(str(page) for page in update) + "\n"
+
+
+def guard_walk(
+    squares: bytearray, height: int, width: int, start: int
+) -> tuple[int, int] | None:
+    # (steps, turns) of the day 6 guard walking up from start until it leaves
+    # the map, None if it walks in a loop instead
+    seen = bytearray(len(squares))
+    row, col = divmod(start, width)
+    direction = 0
+    steps = 0
+    turns = 0
+    while not seen[row * width + col] & 1 << direction:
+        seen[row * width + col] |= 1 << direction
+        d_row, d_col = ((-1, 0), (0, 1), (1, 0), (0, -1))[direction]
+        next_row, next_col = row + d_row, col + d_col
+        if not (0 <= next_row < height and 0 <= next_col < width):
+            return steps, turns
+        if squares[next_row * width + next_col] == ord("#"):
+            direction = (direction + 1) % 4
+            turns += 1
+        else:
+            row, col = next_row, next_col
+            steps += 1
+    return None
+
+
+def generate_day_06(rng: random.Random, height: int, width: int) -> Iterator[str]:
+    # Obstacles become sparser on larger maps, so the guard walks further
+    # between turns. The guard starts on the square (of 100 random ones)
+    # with the longest walk that leaves the map, preferring walks that turn.
+    # Maps where every walk is a loop are generated again.
+    density = min(0.05, 10 / max(height, width))
+    while True:
+        squares = bytearray(
+            ord("#") if rng.random() < density else ord(".")
+            for _ in range(height * width)
+        )
+        best = None
+        for _ in range(100):
+            start = rng.randrange(height * width)
+            if squares[start] == ord("#"):
+                continue
+            walk = guard_walk(squares, height, width, start)
+            if walk is None:
+                continue
+            steps, turns = walk
+            if best is None or (turns > 0, steps) > best[0]:
+                best = (turns > 0, steps), start
+        if best is not None:
+            break
+    squares[best[1]] = ord("^")
+    for row in range(height):
+        yield squares[row * width : (row + 1) * width].decode() + "\n"
+
+
+def generate_day_07(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of equations
+    for _ in range(size):
+        numbers = [
+            rng.randrange(1, 1000 if rng.random() < 0.3 else 10)
+            for _ in range(rng.randrange(3, 13))
+        ]
+        test_value = numbers[0]
+        for n in numbers[1:]:
+            match rng.randrange(3):
+                case 0:
+                    test_value += n
+                case 1:
+                    test_value *= n
+                case 2:
+                    test_value = int(f"{test_value}{n}")
+        if rng.random() < 0.4:
+            # Most likely impossible
+            test_value += rng.randrange(1, 100)
+        yield f"{test_value}: {" ".join(str(n) for n in numbers)}\n"
+
+
+def generate_day_08(rng: random.Random, height: int, width: int) -> Iterator[str]:
+    frequencies = string.ascii_letters + string.digits
+    for _ in range(height):
+        yield "".join(
+            rng.choice(frequencies) if rng.random() < 0.05 else "."
+            for _ in range(width)
+        ) + "\n"
+
+
+def generate_day_09(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of digits in the disk map (a single line)
+    chunk_size = 1 << 16
+    for chunk_start in range(0, size, chunk_size):
+        chunk = []
+        for idx in range(chunk_start, min(chunk_start + chunk_size, size)):
+            # Even positions are files (at least one block), odd ones free space
+            chunk.append(str(rng.randrange(1 - idx % 2, 10)))
+        yield "".join(chunk)
+    yield "\n"
+
+
+def generate_day_10(rng: random.Random, height: int, width: int) -> Iterator[str]:
+    # Heights mostly increase diagonally, which makes for plenty of trails
+    for row in range(height):
+        yield "".join(
+            str(rng.randrange(10) if rng.random() < 0.2 else (row + col) % 10)
+            for col in range(width)
+        ) + "\n"
+
+
+def generate_day_11(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of stones (a single line)
+    for idx in range(size):
+        separator = " " if idx < size - 1 else "\n"
+        yield f"{rng.randrange(1000000)}{separator}"
+
+
+def generate_day_12(rng: random.Random, height: int, width: int) -> Iterator[str]:
+    # Copy plants from the left or top neighbor to grow regions. Only the
+    # previous row is kept.
+    prev = None
+    for _ in range(height):
+        line = []
+        for col in range(width):
+            r = rng.random()
+            if col > 0 and r < 0.6:
+                line.append(line[col - 1])
+            elif prev is not None and r < 0.9:
+                line.append(prev[col])
+            else:
+                line.append(rng.choice(string.ascii_uppercase))
+        prev = line
+        yield "".join(line) + "\n"
+
+
+def generate_day_13(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of claw machines
+    for idx in range(size):
+        while True:
+            ax, ay, bx, by = (rng.randrange(10, 100) for _ in range(4))
+            # Avoid parallel buttons
+            if ax * by != ay * bx:
+                break
+        a, b = rng.randrange(1, 101), rng.randrange(1, 101)
+        px, py = a * ax + b * bx, a * ay + b * by
+        if rng.random() < 0.5:
+            # Most likely unreachable
+            px += rng.randrange(1, 100)
+        if idx > 0:
+            yield "\n"
+        yield f"Button A: X+{ax}, Y+{ay}\n"
+        yield f"Button B: X+{bx}, Y+{by}\n"
+        yield f"Prize: X={px}, Y={py}\n"
+
+
+def generate_day_14(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of robots (on the 101x103 area the solver expects)
+    width, height = 101, 103
+    for _ in range(size):
+        px, py = rng.randrange(width), rng.randrange(height)
+        vx, vy = rng.randrange(-width + 1, width), rng.randrange(-height + 1, height)
+        yield f"p={px},{py} v={vx},{vy}\n"
+
+
+def generate_day_15(rng: random.Random, height: int, width: int) -> Iterator[str]:
+    # Warehouse of the given size, followed by 8 moves per square
+    robot = (height // 2, width // 2)
+    for row in range(height):
+        line = []
+        for col in range(width):
+            if row in (0, height - 1) or col in (0, width - 1):
+                line.append("#")
+            elif (row, col) == robot:
+                line.append("@")
+            else:
+                r = rng.random()
+                line.append("#" if r < 0.05 else "O" if r < 0.25 else ".")
+        yield "".join(line) + "\n"
+    yield "\n"
+    move_count = 8 * height * width
+    line_length = 1000
+    for line_start in range(0, move_count, line_length):
+        length = min(line_length, move_count - line_start)
+        yield "".join(rng.choices("^v<>", k=length)) + "\n"
+
+
+def generate_day_16(rng: random.Random, height: int, width: int) -> Iterator[str]:
+    # Random walls, but the bottom row and the right column inside the border
+    # are kept free, so there's always a path from S (bottom left) to E (top
+    # right)
+    for row in range(height):
+        line = []
+        for col in range(width):
+            if row in (0, height - 1) or col in (0, width - 1):
+                line.append("#")
+            elif (row, col) == (height - 2, 1):
+                line.append("S")
+            elif (row, col) == (1, width - 2):
+                line.append("E")
+            elif row == height - 2 or col == width - 2:
+                line.append(".")
+            else:
+                line.append("#" if rng.random() < 0.3 else ".")
+        yield "".join(line) + "\n"
+
+
+def generate_day_17(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of octal digits of register A (i.e. the output length)
+    # The program has the same shape as the puzzle inputs: it outputs a
+    # function of the lowest 3 bits of A and shifts A right by 3 until it is
+    # zero. Constants are picked so that a self-producing A exists.
+    from solutions import day_17
+
+    while True:
+        k1, k2 = rng.randrange(8), rng.randrange(8)
+        program = [2, 4, 1, k1, 7, 5, 1, k2, 4, rng.randrange(8), 5, 5, 0, 3, 3, 0]
+        if day_17.find_self_producing(0, 0, program):
+            break
+    reg_a = rng.randrange(8 ** (size - 1), 8**size)
+    yield f"Register A: {reg_a}\n"
+    yield "Register B: 0\n"
+    yield "Register C: 0\n"
+    yield "\n"
+    yield f"Program: {",".join(str(n) for n in program)}\n"
+
+
+def generate_day_18(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of falling bytes on the 71x71 grid the solver expects
+    # (at most every square except start and end)
+    side = 71
+    squares = [
+        (x, y)
+        for x in range(side)
+        for y in range(side)
+        if (x, y) not in ((0, 0), (side - 1, side - 1))
+    ]
+    rng.shuffle(squares)
+    for x, y in squares[:size]:
+        yield f"{x},{y}\n"
+
+
+def generate_day_19(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of desired designs
+    # One color is missing as a single stripe towel, and only appears inside
+    # of towels, never at either end or twice in a row. Designs that start or
+    # end with it, or have it twice in a row, aren't possible.
+    colors = "wubrg"
+    missing = rng.choice(colors)
+    towels = set(c for c in colors if c != missing)
+    while len(towels) < 400:
+        towel = "".join(rng.choices(colors, k=rng.randrange(2, 9)))
+        if missing not in (towel[0], towel[-1]) and 2 * missing not in towel:
+            towels.add(towel)
+    towels = sorted(towels)
+    rng.shuffle(towels)
+    yield ", ".join(towels) + "\n"
+    yield "\n"
+    for _ in range(size):
+        length = rng.randrange(20, 61)
+        if rng.random() < 0.5:
+            design = ""
+            while len(design) < length:
+                design += rng.choice(towels)
+        else:
+            design = "".join(rng.choices(colors, k=length))
+        yield design + "\n"
+
+
+def generate_day_20(rng: random.Random, height: int, width: int) -> Iterator[str]:
+    # A single serpentine track, as the race condition puzzle requires: every
+    # odd row is a corridor, the rows in between connect them alternately at
+    # the right and left end. The layout is mirrored at random.
+    corridors = (height - 1) // 2
+    mirrored = rng.random() < 0.5
+    for row in range(height):
+        line = ["#"] * width
+        corridor = (row - 1) // 2
+        if row % 2 == 1 and corridor < corridors:
+            line[1 : width - 1] = "." * (width - 2)
+            if corridor == 0:
+                line[1] = "S"
+            if corridor == corridors - 1:
+                line[width - 2 if corridor % 2 == 0 else 1] = "E"
+        elif row % 2 == 0 and 0 < row and corridor < corridors - 1:
+            line[width - 2 if corridor % 2 == 0 else 1] = "."
+        if mirrored:
+            line.reverse()
+        yield "".join(line) + "\n"
+
+
+def generate_day_21(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of door codes
+    for _ in range(size):
+        yield "".join(rng.choices(string.digits, k=3)) + "A\n"
+
+
+def generate_day_22(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of buyers
+    for _ in range(size):
+        yield f"{rng.randrange(1, 16777216)}\n"
+
+
+def generate_day_23(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of computers (at least 2, every computer is connected to
+    # others)
+    # Random connections (on average 12 per computer) plus a LAN party of 13
+    size = max(size, 2)
+    name_length = max(2, math.ceil(math.log(size, 26)))
+    # Scatter the names over all possible names, so that some start with "t"
+    name_count = 26**name_length
+    factor = rng.randrange(1, name_count, 2)
+    while factor % 13 == 0:
+        factor = rng.randrange(1, name_count, 2)
+    offset = rng.randrange(name_count)
+
+    def name(idx: int) -> str:
+        idx = (factor * idx + offset) % name_count
+        letters = []
+        for _ in range(name_length):
+            idx, letter = divmod(idx, 26)
+            letters.append(string.ascii_lowercase[letter])
+        return "".join(reversed(letters))
+
+    for idx in range(size):
+        for _ in range(6):
+            other = rng.randrange(size - 1)
+            other += other >= idx
+            yield f"{name(idx)}-{name(other)}\n"
+    party = rng.sample(range(size), min(13, size))
+    for a, b in itertools.combinations(party, 2):
+        yield f"{name(a)}-{name(b)}\n"
+
+
+def generate_day_24(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of input bits (at least 16)
+    # A ripple-carry adder with the outputs of four pairs of gates swapped,
+    # like in the puzzle. Gates are kept in memory to shuffle them.
+    size = max(size, 16)
+    name_length = max(3, math.ceil(math.log(5 * size, 23)) + 1)
+    used = set()
+
+    def wire() -> str:
+        # Must not start with x, y or z
+        while True:
+            name = rng.choice(string.ascii_lowercase[:23]) + "".join(
+                rng.choices(string.ascii_lowercase, k=name_length - 1)
+            )
+            if name not in used:
+                used.add(name)
+                return name
+
+    for prefix in "xy":
+        for bit in range(size):
+            yield f"{prefix}{bit:02}: {rng.randrange(2)}\n"
+    yield "\n"
+    gates = [["x00", "XOR", "y00", "z00"], ["x00", "AND", "y00", wire()]]
+    carry = gates[-1][3]
+    adders = {}
+    for bit in range(1, size):
+        x, y, z = f"x{bit:02}", f"y{bit:02}", f"z{bit:02}"
+        s, a, b = wire(), wire(), wire()
+        c_out = f"z{size:02}" if bit == size - 1 else wire()
+        adders[bit] = {
+            "s": [x, "XOR", y, s],
+            "z": [s, "XOR", carry, z],
+            "a": [x, "AND", y, a],
+            "b": [s, "AND", carry, b],
+            "c": [a, "OR", b, c_out],
+        }
+        gates.extend(adders[bit].values())
+        carry = c_out
+    # Swap outputs within one full adder each, keeping the swapped bits apart
+    swap_types = (("z", "a"), ("z", "b"), ("z", "c"), ("s", "a"))
+    bits = rng.sample(range(2, size - 2, 3), 4)
+    for bit in bits:
+        first, second = rng.choice(swap_types)
+        gate1, gate2 = adders[bit][first], adders[bit][second]
+        gate1[3], gate2[3] = gate2[3], gate1[3]
+    rng.shuffle(gates)
+    for in1, op, in2, out in gates:
+        if rng.random() < 0.5:
+            in1, in2 = in2, in1
+        yield f"{in1} {op} {in2} -> {out}\n"
+
+
+def generate_day_25(rng: random.Random, size: int) -> Iterator[str]:
+    # size: number of schematics (locks and keys)
+    for idx in range(size):
+        is_lock = rng.random() < 0.5
+        heights = [rng.randrange(6) for _ in range(5)]
+        if idx > 0:
+            yield "\n"
+        yield "#####\n" if is_lock else ".....\n"
+        for row in range(1, 6):
+            if is_lock:
+                yield "".join("#" if h >= row else "." for h in heights) + "\n"
+            else:
+                yield "".join("#" if h >= 6 - row else "." for h in heights) + "\n"
+        yield ".....\n" if is_lock else "#####\n"
+
+
+GENERATORS: dict[int, Callable[..., Iterator[str]]] = {
+    1: generate_day_01,
+    2: generate_day_02,
+    3: generate_day_03,
+    4: generate_day_04,
+    5: generate_day_05,
+    6: generate_day_06,
+    7: generate_day_07,
+    8: generate_day_08,
+    9: generate_day_09,
+    10: generate_day_10,
+    11: generate_day_11,
+    12: generate_day_12,
+    13: generate_day_13,
+    14: generate_day_14,
+    15: generate_day_15,
+    16: generate_day_16,
+    17: generate_day_17,
+    18: generate_day_18,
+    19: generate_day_19,
+    20: generate_day_20,
+    21: generate_day_21,
+    22: generate_day_22,
+    23: generate_day_23,
+    24: generate_day_24,
+    25: generate_day_25,
+}
+
+GRID_DAYS = {4, 6, 8, 10, 12, 15, 16, 20}
+
+
+def generate(
+    day: int, size: int, width: int | None = None, seed: int = 0
+) -> Iterator[str]:
+    rng = random.Random(seed)
+    if day in GRID_DAYS:
+        return GENERATORS[day](rng, size, size if width is None else width)
+    return GENERATORS[day](rng, size)
+
+
+def write_input(pieces: Iterator[str], output_file: os.PathLike | None) -> None:
+    if output_file is None or output_file == "-":
+        sys.stdout.writelines(pieces)
+        return
+    with open(output_file, "w", buffering=1 << 20) as f:
+        f.writelines(pieces)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--day", type=int, required=True, choices=GENERATORS)
+    parser.add_argument("--size", type=int, required=True)
+    # Only used by grid based days, defaults to a square grid
+    parser.add_argument("--width", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+    write_input(generate(args.day, args.size, args.width, args.seed), args.output)
@@ -0,0 +1,129 @@
+from array import array
+from typing import Iterable, Iterator, MutableSequence
+
+# Value of the padding cells around the grid. It never matches a character
+# from the puzzle inputs, so solvers can check the cell contents instead of
+# the bounds.
+BORDER = 0
+
+
+class Grid:
+    # Cells are stored row-major in a flat bytearray (or array for larger
+    # values), surrounded by one row/column of padding on every side. A cell is
+    # addressed by its integer index, neighbors are at fixed index offsets.
+    def __init__(
+        self,
+        height: int,
+        width: int,
+        fill: int = BORDER,
+        border: int = BORDER,
+        typecode: str | None = None,
+        cells: MutableSequence[int] | None = None,
+    ):
+        self.height = height
+        self.width = width
+        self.stride = width + 2
+        self.border = border
+        self.typecode = typecode
+        # Clockwise, starting with up
+        self.directions = (-self.stride, 1, self.stride, -1)
+        self.up, self.right, self.down, self.left = self.directions
+        # Diagonals, clockwise, starting with top left
+        self.diagonals = (
+            -self.stride - 1,
+            -self.stride + 1,
+            self.stride + 1,
+            self.stride - 1,
+        )
+        if cells is None:
+            size = self.stride * (height + 2)
+            if typecode is None:
+                cells = bytearray([border]) * size
+            else:
+                cells = array(typecode, [border]) * size
+            self.cells = cells
+            if fill != border:
+                for row in range(height):
+                    start = self.index(row, 0)
+                    self.cells[start : start + width] = self._row_of(fill)
+        else:
+            self.cells = cells
+
+    def _row_of(self, value: int) -> MutableSequence[int]:
+        if self.typecode is None:
+            return bytearray([value]) * self.width
+        return array(self.typecode, [value]) * self.width
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], border: int = BORDER) -> "Grid":
+        cells = bytearray()
+        width = None
+        height = 0
+        for line in lines:
+            row = line.strip("\n").encode()
+            if width is None:
+                width = len(row)
+                # Top padding
+                cells += bytes([border]) * (width + 2)
+            cells.append(border)
+            cells += row
+            cells.append(border)
+            height += 1
+        if width is None:
+            width = 0
+            cells += bytes([border]) * 2
+        # Bottom padding
+        cells += bytes([border]) * (width + 2)
+        return cls(height, width, border=border, cells=cells)
+
+    def index(self, row: int, col: int) -> int:
+        return (row + 1) * self.stride + col + 1
+
+    def position(self, idx: int) -> tuple[int, int]:
+        row, col = divmod(idx, self.stride)
+        return row - 1, col - 1
+
+    def is_inside(self, idx: int) -> bool:
+        row, col = self.position(idx)
+        return 0 <= row < self.height and 0 <= col < self.width
+
+    def __getitem__(self, idx: int) -> int:
+        return self.cells[idx]
+
+    def __setitem__(self, idx: int, value: int) -> None:
+        self.cells[idx] = value
+
+    def indices(self) -> Iterator[int]:
+        # Indices of all cells inside the grid, row by row
+        for row in range(self.height):
+            start = self.index(row, 0)
+            yield from range(start, start + self.width)
+
+    def find(self, value: int) -> int | None:
+        for idx in self.indices():
+            if self.cells[idx] == value:
+                return idx
+        return None
+
+    def find_all(self, value: int) -> list[int]:
+        return [idx for idx in self.indices() if self.cells[idx] == value]
+
+    def copy(self) -> "Grid":
+        return Grid(
+            self.height,
+            self.width,
+            border=self.border,
+            typecode=self.typecode,
+            cells=self.cells[:],
+        )
+
+    def new_like(self, fill: int = BORDER, typecode: str | None = None) -> "Grid":
+        # Empty grid of the same size, e.g. to mark visited cells
+        return Grid(self.height, self.width, fill=fill, typecode=typecode)
+
+    def to_lines(self) -> list[str]:
+        lines = []
+        for row in range(self.height):
+            start = self.index(row, 0)
+            lines.append(bytes(self.cells[start : start + self.width]).decode())
+        return lines
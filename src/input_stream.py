@@ -0,0 +1,64 @@
+import contextlib
+import mmap
+import os
+import stat
+import sys
+from typing import IO, Iterator
+
+# "--input -" reads standard input
+STDIN = "-"
+
+# Characters (or bytes) read at a time from streamed inputs
+CHUNK_SIZE = 1 << 16
+
+
+def is_stream(input_file: os.PathLike) -> bool:
+    # Standard input, pipes and other inputs that can only be read once and
+    # can't be memory mapped
+    if os.fspath(input_file) == STDIN:
+        return True
+    return not stat.S_ISREG(os.stat(input_file).st_mode)
+
+
+def open_input(
+    input_file: os.PathLike, binary: bool = False
+) -> contextlib.AbstractContextManager[IO]:
+    # Like open(input_file), but "-" is standard input
+    if os.fspath(input_file) == STDIN:
+        # Standard input stays open for whoever reads it next
+        return contextlib.nullcontext(sys.stdin.buffer if binary else sys.stdin)
+    return open(input_file, "rb" if binary else "r")
+
+
+@contextlib.contextmanager
+def mapped(input_file: os.PathLike) -> Iterator[bytes | mmap.mmap]:
+    # Contents of the file as a read-only memory map
+    with open(input_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files can't be mapped
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def read_chunks(f: IO, size: int = CHUNK_SIZE) -> Iterator[str | bytes]:
+    # The rest of an open input, at most size characters at a time
+    while chunk := f.read(size):
+        yield chunk
+
+
+def read_line_chunks(f: IO[bytes], size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    # Like read_chunks, but every chunk ends at the end of a line, so no line
+    # is split. Lines longer than size make longer chunks.
+    pieces = []
+    for chunk in read_chunks(f, size):
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            pieces.append(chunk)
+            continue
+        pieces.append(chunk[:end])
+        yield b"".join(pieces)
+        pieces = [chunk[end:]]
+    if rest := b"".join(pieces):
+        yield rest
@@ -0,0 +1,194 @@
+import contextlib
+import gc
+import itertools
+import os
+import re
+from array import array
+from typing import Iterator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import input_stream
+
+# Integers are runs of digits, optionally preceded by a minus sign. Everything
+# else (spaces, commas, colons, ...) separates them.
+INT_PATTERN = re.compile(rb"-?\d+")
+
+# Everything but digits and minus signs becomes a space, so that bytes.split()
+# finds the integers
+SEPARATORS = bytes(c if c in b"-0123456789" else ord(" ") for c in range(256))
+
+# Longer numbers might not fit into int64, they're parsed without NumPy
+MAX_NUMPY_DIGITS = 18
+
+NEWLINE = ord("\n")
+
+# Bytes parsed at a time. Parsing with NumPy takes temporaries several times
+# the size of a block, so the memory used grows with the output, not with the
+# temporaries for the whole input.
+BLOCK_SIZE = 1 << 22
+
+
+def _blocks(input_file: os.PathLike) -> Iterator[bytes]:
+    # The input in blocks of about BLOCK_SIZE bytes of whole lines, so no
+    # number is split. Regular files are memory mapped and copied a block at a
+    # time, streamed inputs are read in chunks.
+    if input_stream.is_stream(input_file):
+        with input_stream.open_input(input_file, binary=True) as f:
+            yield from input_stream.read_line_chunks(f, BLOCK_SIZE)
+        return
+    with input_stream.mapped(input_file) as data:
+        start = 0
+        while start < len(data):
+            end = data.find(b"\n", start + BLOCK_SIZE) + 1 or len(data)
+            yield data[start:end]
+            start = end
+
+
+@contextlib.contextmanager
+def _gc_paused() -> Iterator[None]:
+    # Building millions of small lists triggers the cyclic garbage collector
+    # over and over, though none of them can be part of a cycle
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _parse_numpy(
+    data: bytes, lines: bool = False
+) -> tuple["np.ndarray", "np.ndarray | None"] | None:
+    # Values of all integers and, if requested, for each line the index of the
+    # value after its last one. None if there are too long numbers. Works on
+    # all bytes at once instead of token by token.
+    buf = np.frombuffer(data, dtype=np.uint8)
+    is_digit = (buf >= ord("0")) & (buf <= ord("9"))
+    edges = np.diff(is_digit.view(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+    line_ends = None
+    if lines:
+        line_ends = np.searchsorted(starts, np.flatnonzero(buf == NEWLINE))
+        # Like splitlines, a last line without a newline counts too
+        if len(buf) > 0 and buf[-1] != NEWLINE:
+            line_ends = np.append(line_ends, len(starts))
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.int64), line_ends
+    if lengths.max() > MAX_NUMPY_DIGITS:
+        return None
+    # Digit by digit for all numbers at once, aligned at their last digit.
+    # Shorter numbers get leading zeros.
+    values = np.zeros(len(starts), dtype=np.int64)
+    for offset in range(lengths.max(), 0, -1):
+        positions = ends - offset
+        digits = buf[np.maximum(positions, 0)].astype(np.int64) - ord("0")
+        values *= 10
+        values += np.where(positions >= starts, digits, 0)
+    negative = starts > 0
+    negative[negative] = buf[starts[negative] - 1] == ord("-")
+    values[negative] *= -1
+    return values, line_ends
+
+
+def _parse_python(data: bytes) -> list[int]:
+    try:
+        return list(map(int, data.translate(SEPARATORS).split()))
+    except ValueError:
+        # Minus signs that aren't part of a number
+        return [int(n) for n in INT_PATTERN.findall(data)]
+
+
+def _block_ints(data: bytes) -> "np.ndarray | list[int]":
+    if np is not None:
+        parsed = _parse_numpy(data)
+        if parsed is not None:
+            return parsed[0]
+    return _parse_python(data)
+
+
+def _block_rows(data: bytes) -> list[list[int]]:
+    if np is not None:
+        parsed = _parse_numpy(data, lines=True)
+        if parsed is not None:
+            values, line_ends = parsed
+            flat = values.tolist()
+            line_ends = line_ends.tolist()
+            line_starts = [0] + line_ends[:-1]
+            return [flat[start:end] for start, end in zip(line_starts, line_ends)]
+    return [_parse_python(line) for line in data.splitlines()]
+
+
+def read_ints(input_file: os.PathLike) -> list[int]:
+    # All integers of the input, in order
+    values = []
+    for data in _blocks(input_file):
+        ints = _block_ints(data)
+        values += ints if isinstance(ints, list) else ints.tolist()
+    return values
+
+
+def read_int_array(input_file: os.PathLike) -> "np.ndarray | array":
+    # Like read_ints, as an int64 NumPy array if available
+    if np is None:
+        values = array("q")
+        for data in _blocks(input_file):
+            values.extend(_parse_python(data))
+        return values
+    arrays = [
+        np.asarray(_block_ints(data), dtype=np.int64) for data in _blocks(input_file)
+    ]
+    if len(arrays) == 1:
+        return arrays[0]
+    return np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+
+
+def read_int_chunks(
+    input_file: os.PathLike, size: int = input_stream.CHUNK_SIZE
+) -> Iterator["np.ndarray | list[int]"]:
+    # The integers of the input, chunk by chunk, for inputs that don't fit
+    # into memory. Every chunk holds the integers of about size bytes of whole
+    # lines, even regular files aren't mapped at once.
+    with input_stream.open_input(input_file, binary=True) as f:
+        for data in input_stream.read_line_chunks(f, size):
+            yield _block_ints(data)
+
+
+def read_int_ragged(input_file: os.PathLike) -> tuple["np.ndarray", "np.ndarray"]:
+    # Like read_int_rows, as one int64 array of all integers and the offsets
+    # of the lines in it: line i is values[offsets[i] : offsets[i + 1]].
+    # Requires NumPy. Raises OverflowError for numbers that don't fit into
+    # int64.
+    values = []
+    offsets = [np.zeros(1, dtype=np.int64)]
+    count = 0
+    for data in _blocks(input_file):
+        parsed = _parse_numpy(data, lines=True)
+        if parsed is None:
+            rows = _block_rows(data)
+            parsed = (
+                np.asarray(list(itertools.chain.from_iterable(rows)), dtype=np.int64),
+                np.cumsum([len(row) for row in rows], dtype=np.int64),
+            )
+        block_values, line_ends = parsed
+        values.append(block_values)
+        offsets.append(line_ends + count)
+        count += len(block_values)
+    if not values:
+        return np.zeros(0, dtype=np.int64), offsets[0]
+    return np.concatenate(values), np.concatenate(offsets)
+
+
+def read_int_rows(input_file: os.PathLike) -> list[list[int]]:
+    # The integers of each line of the input, one list per line
+    rows = []
+    with _gc_paused():
+        for data in _blocks(input_file):
+            rows += _block_rows(data)
+    return rows
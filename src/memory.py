@@ -0,0 +1,133 @@
+import os
+import resource
+import sys
+import threading
+import tracemalloc
+from typing import Any, Callable
+
+# Seconds between two samples of the memory usage
+SAMPLE_INTERVAL = 0.005
+
+# A new snapshot of the allocation sites is taken whenever the traced memory
+# grew by this fraction since the last one, so the last snapshot is close to
+# the peak
+SNAPSHOT_GROWTH = 0.1
+
+# Allocations of the measurement itself are left out of the top sites
+# (threads keep their bookkeeping in weak sets)
+_IGNORED_FILES = (tracemalloc.__file__, __file__, threading.__file__, "*_weakrefset.py")
+
+
+def current_rss() -> int | None:
+    # Resident set size in bytes, if the platform can tell
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def max_rss() -> int:
+    # Highest resident set size of the process so far
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    snapshot = tracemalloc.take_snapshot()
+    return snapshot.filter_traces(
+        [tracemalloc.Filter(False, filename) for filename in _IGNORED_FILES]
+    )
+
+
+def top_sites(baseline: tracemalloc.Snapshot, top: int) -> list[dict]:
+    # Sites that allocated the most memory since the baseline snapshot
+    stats = _take_snapshot().compare_to(baseline, "lineno")
+    stats.sort(key=lambda stat: stat.size_diff, reverse=True)
+    return [
+        {
+            "site": f"{os.path.basename(stat.traceback[0].filename)}"
+            f":{stat.traceback[0].lineno}",
+            "size": stat.size_diff,
+            "count": stat.count_diff,
+        }
+        for stat in stats[:top]
+        if stat.size_diff > 0
+    ]
+
+
+class _Sampler(threading.Thread):
+    # Samples the RSS and the traced memory while a step runs
+    def __init__(self, baseline: tracemalloc.Snapshot, top: int):
+        super().__init__(daemon=True)
+        self.stopped = threading.Event()
+        self.baseline = baseline
+        self.top = top
+        self.rss_peak = current_rss() or 0
+        self.traced_peak = 0
+        self.top_sites = None
+        self.snapshot_size, _ = tracemalloc.get_traced_memory()
+
+    def sample(self) -> None:
+        rss = current_rss()
+        if rss is not None:
+            self.rss_peak = max(self.rss_peak, rss)
+        current, peak = tracemalloc.get_traced_memory()
+        self.traced_peak = max(self.traced_peak, peak)
+        if current > self.snapshot_size * (1 + SNAPSHOT_GROWTH):
+            # Only the top sites are kept, the snapshot itself is large
+            self.top_sites = top_sites(self.baseline, self.top)
+            self.snapshot_size = current
+            # The snapshot is traced too, it shouldn't count as peak
+            tracemalloc.reset_peak()
+
+    def run(self) -> None:
+        while not self.stopped.wait(SAMPLE_INTERVAL):
+            self.sample()
+
+
+def measure(func: Callable, *args, top: int = 5) -> tuple[Any, dict]:
+    # Calls func and returns its result together with the peak traced memory
+    # (Python allocations), the peak RSS and the allocation sites that
+    # accounted for most of the memory allocated by the call near its peak.
+    # The traced peak is relative to the memory in use before the call, the
+    # RSS peak is the process total.
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    baseline = _take_snapshot()
+    traced_before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    sampler = _Sampler(baseline, top)
+    sampler.start()
+    try:
+        result = func(*args)
+    finally:
+        sampler.stopped.set()
+        sampler.join()
+    sampler.sample()
+    # Short calls might end before the first snapshot
+    sites = sampler.top_sites
+    if sites is None:
+        sites = top_sites(baseline, top)
+    if started_tracing:
+        tracemalloc.stop()
+    # Without RSS samples, fall back to the high water mark of the process
+    rss_peak = sampler.rss_peak or max_rss()
+    usage = {
+        "peak": max(sampler.traced_peak - traced_before, 0),
+        "rss_peak": rss_peak,
+        "top": sites,
+    }
+    return result, usage
+
+
+def format_size(size: int | None) -> str:
+    if size is None:
+        return "-"
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
@@ -0,0 +1,146 @@
+import functools
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import types
+from pathlib import Path
+from typing import Any, Callable
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".parse-cache"
+
+# File layout: header, pickle payload, out-of-band buffers. Payload and buffers
+# start at ALIGNMENT byte boundaries.
+MAGIC = b"AOCPARSE"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+HEADER = struct.Struct("<8sIQI")
+BUFFER_LENGTH = struct.Struct("<Q")
+
+
+def file_hash(path: os.PathLike) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def local_dependencies(module: types.ModuleType) -> set[Path]:
+    # The source files of the module and of the local modules (in the same
+    # directory) it uses, directly or through other local modules, e.g.
+    # day-02.py -> int_reader.py -> input_stream.py
+    src_dir = Path(module.__file__).resolve().parent
+    sources = set()
+    pending = [module]
+    while pending:
+        current = pending.pop()
+        source = Path(current.__file__).resolve()
+        if source in sources:
+            continue
+        sources.add(source)
+        for value in vars(current).values():
+            dependency = value
+            if not isinstance(value, types.ModuleType):
+                dependency = sys.modules.get(getattr(value, "__module__", None))
+            path = getattr(dependency, "__file__", None)
+            if path is not None and Path(path).resolve().parent == src_dir:
+                pending.append(dependency)
+    return sources
+
+
+@functools.cache
+def source_hash(module: types.ModuleType) -> str:
+    # The parsed structures depend on the day module and the local modules it
+    # uses (e.g. grid.py), so a change to any of their sources invalidates the
+    # cache. Hashed once per process: the imported code doesn't change while
+    # it runs, and loads from the cache (e.g. in batch workers) would take
+    # longer than parsing most inputs otherwise.
+    sources = local_dependencies(module)
+    h = hashlib.sha256(str(FORMAT_VERSION).encode())
+    for path in sorted(sources):
+        h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def cache_path(
+    cache_dir: os.PathLike,
+    day: int,
+    module: types.ModuleType,
+    input_file: os.PathLike,
+) -> Path:
+    key = f"day-{day:02}-{source_hash(module)}-{file_hash(input_file)}"
+    return Path(cache_dir) / f"{key}.bin"
+
+
+def _padding(offset: int) -> int:
+    return -offset % ALIGNMENT
+
+
+def dump(obj: Any, path: os.PathLike) -> None:
+    # Large buffers (e.g. the bytearray of a grid) are stored out-of-band, at
+    # aligned offsets. Objects that can be rebuilt on top of a buffer (NumPy
+    # arrays) use the mapped file without a copy. Others are copied from it in
+    # one piece when they're loaded: a bytearray is rebuilt as a new one.
+    buffers = []
+    payload = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    raw_buffers = [buffer.raw() for buffer in buffers]
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(payload), len(raw_buffers))
+    header += b"".join(BUFFER_LENGTH.pack(len(raw)) for raw in raw_buffers)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first, readers never see partial files
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        offset = 0
+        for chunk in (header, payload, *raw_buffers):
+            f.write(b"\0" * _padding(offset))
+            offset += _padding(offset)
+            f.write(chunk)
+            offset += len(chunk)
+    os.replace(tmp_path, path)
+
+
+def load(path: os.PathLike) -> Any:
+    with open(path, "rb") as f:
+        # Copy-on-write mapping: buffers used without a copy are writable for
+        # the solvers, but the cache file never changes
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    view = memoryview(mapped)
+    magic, version, payload_length, buffer_count = HEADER.unpack_from(view)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Not a parse cache file: {path}")
+    offset = HEADER.size
+    buffer_lengths = []
+    for _ in range(buffer_count):
+        buffer_lengths.append(BUFFER_LENGTH.unpack_from(view, offset)[0])
+        offset += BUFFER_LENGTH.size
+    offset += _padding(offset)
+    payload = view[offset : offset + payload_length]
+    offset += payload_length
+    buffers = []
+    for length in buffer_lengths:
+        offset += _padding(offset)
+        buffers.append(view[offset : offset + length])
+        offset += length
+    return pickle.loads(payload, buffers=buffers)
+
+
+def load_or_parse(
+    day: int,
+    module: types.ModuleType,
+    parse: Callable[[types.ModuleType, os.PathLike], Any],
+    input_file: os.PathLike,
+    cache_dir: os.PathLike = CACHE_DIR,
+) -> Any:
+    path = cache_path(cache_dir, day, module, input_file)
+    try:
+        return load(path)
+    except (FileNotFoundError, ValueError, pickle.UnpicklingError):
+        pass
+    state = parse(module, input_file)
+    dump(state, path)
+    return state
@@ -0,0 +1,126 @@
+import argparse
+import contextlib
+import cProfile
+import functools
+import inspect
+import os
+import pstats
+import sys
+import time
+import types
+from typing import Callable, Iterator, TextIO
+
+# Names of the functions marked with @hot, per module
+HOT_FUNCTIONS: dict[str, list[str]] = {}
+
+# Function name -> [calls, cumulative time, self time]
+type Stats = dict[str, list]
+
+
+def hot(func: Callable) -> Callable:
+    # Marks a function to be timed with `--profile timer`. The function itself
+    # is returned unchanged, so there's no overhead when profiling is off.
+    HOT_FUNCTIONS.setdefault(func.__module__, []).append(func.__name__)
+    return func
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    # cprofile: every function call. timer: only the functions marked with
+    # @hot and the ones given with --profile-functions, with less overhead.
+    parser.add_argument("--profile", choices=("cprofile", "timer"), default=None)
+    parser.add_argument("--profile-functions", type=str, nargs="+", default=[])
+    # Where to write the stats, stderr by default
+    parser.add_argument("--profile-output", type=str, default=None)
+
+
+def function_name(filename: str, line: int, name: str) -> str:
+    # Same format as pstats, without the directory, so dumps from different
+    # checkouts can be compared
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def _timed(func: Callable, entry: list, child_times: list[float]) -> Callable:
+    depth = 0
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal depth
+        entry[0] += 1
+        depth += 1
+        child_times.append(0.0)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            # Self time excludes the time spent in other timed calls
+            entry[2] += elapsed - child_times.pop()
+            depth -= 1
+            # Recursive calls are already part of the outermost call
+            if depth == 0:
+                entry[1] += elapsed
+            if child_times:
+                child_times[-1] += elapsed
+
+    return wrapper
+
+
+def instrument(module: types.ModuleType, names: list[str], stats: Stats) -> None:
+    # Replaces the functions in the module namespace, so calls from the rest
+    # of the module (including recursive calls) go through the timer
+    child_times = []
+    for name in names:
+        func = getattr(module, name)
+        # Name the original function if it's wrapped, e.g. by functools.cache
+        code = inspect.unwrap(func).__code__
+        key = function_name(code.co_filename, code.co_firstlineno, code.co_name)
+        entry = stats.setdefault(key, [0, 0.0, 0.0])
+        setattr(module, name, _timed(func, entry, child_times))
+
+
+def cprofile_stats(profiler: cProfile.Profile) -> Stats:
+    stats = {}
+    for (filename, line, name), timing in pstats.Stats(profiler).stats.items():
+        _, calls, self_time, cumulative, _ = timing
+        entry = stats.setdefault(function_name(filename, line, name), [0, 0.0, 0.0])
+        entry[0] += calls
+        entry[1] += cumulative
+        entry[2] += self_time
+    return stats
+
+
+def write_stats(stats: Stats, mode: str, output: TextIO) -> None:
+    # Tab separated and sorted by function name, so the dumps of two runs can
+    # be compared with diff
+    output.write(f"# profile: {mode}\n")
+    output.write("function\tcalls\tcumulative\tself\n")
+    for name in sorted(stats):
+        calls, cumulative, self_time = stats[name]
+        output.write(f"{name}\t{calls}\t{cumulative:.6f}\t{self_time:.6f}\n")
+
+
+@contextlib.contextmanager
+def session(args: argparse.Namespace, module_name: str = "__main__") -> Iterator:
+    # Profiles the body of the with statement, as configured by the arguments
+    # from add_arguments
+    if args.profile is None:
+        yield
+        return
+    stats = {}
+    if args.profile == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+        stats = cprofile_stats(profiler)
+    else:
+        names = HOT_FUNCTIONS.get(module_name, []) + args.profile_functions
+        instrument(sys.modules[module_name], names, stats)
+        yield
+    if args.profile_output is None:
+        write_stats(stats, args.profile, sys.stderr)
+    else:
+        with open(args.profile_output, "w") as f:
+            write_stats(stats, args.profile, f)
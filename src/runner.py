@@ -0,0 +1,425 @@
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import os
+import time
+import types
+from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+import answer_cache
+import counters
+import memory
+import parse_cache
+import solutions
+
+SRC_DIR = Path(__file__).resolve().parent
+DATA_DIR = SRC_DIR.parent / "data"
+TIMINGS_FILE = SRC_DIR.parent / ".timings.json"
+DAYS = range(1, 26)
+
+
+class Solver(NamedTuple):
+    parse: Callable[[types.ModuleType, os.PathLike], Any]
+    part1: Callable[[types.ModuleType, Any], Any]
+    part2: Callable[[types.ModuleType, Any], Any] | None
+    # Some days compute both answers in a single call. For those, part1
+    # returns both answers and there is no separate part 2 step.
+    combined: bool = False
+
+
+def input_path(day: int, data_dir: os.PathLike = DATA_DIR) -> Path:
+    return Path(data_dir) / f"input-{day:02}.txt"
+
+
+# Days that compute both answers in a single solve(state) call
+COMBINED_DAYS = {3, 10, 12, 16, 19, 22}
+
+# Days whose parse() returns the input file itself, which is only read (in
+# chunks) while solving, so the parse time is included in the part timings
+STREAMED_DAYS = {3}
+
+# Days without a second part
+SINGLE_PART_DAYS = {25}
+
+
+def _parse(m: types.ModuleType, input_file: os.PathLike) -> Any:
+    return m.parse(input_file)
+
+
+def _part1(m: types.ModuleType, state: Any) -> Any:
+    return m.part1(state)
+
+
+def _part2(m: types.ModuleType, state: Any) -> Any:
+    return m.part2(state)
+
+
+def _solve(m: types.ModuleType, state: Any) -> tuple:
+    return m.solve(state)
+
+
+def _solver(day: int) -> Solver:
+    # The common interface of the day modules (see solutions.py)
+    if day in COMBINED_DAYS:
+        return Solver(_parse, _solve, None, combined=True)
+    return Solver(_parse, _part1, None if day in SINGLE_PART_DAYS else _part2)
+
+
+SOLVERS = {day: _solver(day) for day in DAYS}
+
+
+def timed(func: Callable, *args) -> tuple[Any, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def parts_of(day: int) -> tuple[int, ...]:
+    solver = SOLVERS[day]
+    if solver.combined or solver.part2 is None:
+        return (1,)
+    return (1, 2)
+
+
+def parse(
+    day: int, input_file: os.PathLike, cache_dir: os.PathLike | None = None
+) -> Any:
+    module = solutions.load(day)
+    solver = SOLVERS[day]
+    # Days that read their input while solving have nothing to cache
+    if cache_dir is None or day in STREAMED_DAYS:
+        return solver.parse(module, input_file)
+    return parse_cache.load_or_parse(day, module, solver.parse, input_file, cache_dir)
+
+
+def run_parts(
+    day: int,
+    input_file: os.PathLike,
+    parts: tuple[int, ...],
+    parse_cache_dir: os.PathLike | None = None,
+    measure_memory: bool = False,
+    answer_cache_dir: os.PathLike | None = None,
+    count: bool = False,
+) -> dict:
+    module = solutions.load(day)
+    solver = SOLVERS[day]
+    cache = answer_cache.AnswerCache(answer_cache_dir, day, module, input_file)
+    # The parts answered by each step
+    if solver.combined:
+        steps = {"part1": (1, 2)}
+    else:
+        steps = {f"part{part}": (part,) for part in parts}
+    answers = {}
+    # Steps answered from the cache don't run and keep None
+    timings = {"parse": None} | {step: None for step in steps}
+    if solver.combined:
+        timings["part2"] = None
+    # Only filled when measuring the memory usage or counting
+    usage = {}
+    counts = {}
+
+    def run_step(step: str, func: Callable, *args) -> Any:
+        session = counters.session() if count else contextlib.nullcontext()
+        with session as step_counts:
+            if measure_memory:
+                (result, timings[step]), usage[step] = memory.measure(
+                    timed, func, *args
+                )
+            else:
+                result, timings[step] = timed(func, *args)
+        if count:
+            counts[step] = dict(sorted(step_counts.items()))
+        return result
+
+    todo = []
+    for step, step_parts in steps.items():
+        cached = cache.get(step_parts)
+        if cached is None:
+            todo.append(step)
+        else:
+            answers.update(cached)
+    if todo:
+        state = run_step("parse", parse, day, input_file, parse_cache_dir)
+    for step in todo:
+        func = solver.part1 if step == "part1" else solver.part2
+        answer = run_step(step, func, module, state)
+        step_answers = dict(zip(steps[step], answer if solver.combined else (answer,)))
+        cache.put(step_answers)
+        answers.update(step_answers)
+    result = {"day": day, "answers": dict(sorted(answers.items())), "timings": timings}
+    if measure_memory:
+        result["memory"] = usage
+    if count:
+        result["counters"] = counts
+    return result
+
+
+def run_day(
+    day: int,
+    input_file: os.PathLike,
+    parse_cache_dir: os.PathLike | None = None,
+    measure_memory: bool = False,
+    answer_cache_dir: os.PathLike | None = None,
+    count: bool = False,
+) -> dict:
+    return run_parts(
+        day,
+        input_file,
+        parts_of(day),
+        parse_cache_dir,
+        measure_memory,
+        answer_cache_dir,
+        count,
+    )
+
+
+def merge_results(results: list[dict]) -> dict:
+    # Results of the parts of one day that ran as separate tasks. Each task
+    # parsed the input on its own, so only the first parse time is kept.
+    merged = {"day": results[0]["day"], "answers": {}, "timings": {}}
+    for result in sorted(results, key=lambda r: min(r["answers"])):
+        merged["answers"].update(result["answers"])
+        for step, seconds in result["timings"].items():
+            merged["timings"].setdefault(step, seconds)
+        for step, usage in result.get("memory", {}).items():
+            merged.setdefault("memory", {}).setdefault(step, usage)
+        for step, counts in result.get("counters", {}).items():
+            merged.setdefault("counters", {}).setdefault(step, counts)
+    merged["answers"] = dict(sorted(merged["answers"].items()))
+    return merged
+
+
+def read_timings(timings_file: os.PathLike) -> dict[int, dict]:
+    try:
+        with open(timings_file, "r") as f:
+            return {int(day): timings for day, timings in json.load(f).items()}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_timings(timings_file: os.PathLike, results: list[dict]) -> None:
+    timings = read_timings(timings_file)
+    for result in results:
+        # Steps answered from the cache keep their recorded time
+        recorded = timings.get(result["day"], {})
+        timings[result["day"]] = {
+            step: recorded.get(step) if seconds is None else seconds
+            for step, seconds in result["timings"].items()
+        }
+    with open(timings_file, "w") as f:
+        json.dump({str(day): timings[day] for day in sorted(timings)}, f, indent=2)
+
+
+def expected_time(day: int, parts: tuple[int, ...], timings: dict[int, dict]) -> float:
+    # Days without recorded timings are scheduled first, they might be slow
+    if day not in timings:
+        return float("inf")
+    steps = ["parse"] + [f"part{part}" for part in parts]
+    return sum(timings[day].get(step) or 0.0 for step in steps)
+
+
+def run_parallel(
+    days: list[int],
+    data_dir: os.PathLike,
+    timings: dict[int, dict],
+    jobs: int | None,
+    on_day_done: Callable[[dict], None],
+    parse_cache_dir: os.PathLike | None = None,
+    measure_memory: bool = False,
+    answer_cache_dir: os.PathLike | None = None,
+    count: bool = False,
+) -> list[dict]:
+    # Each day once, in the order given: the pending parts are counted per day
+    days = list(dict.fromkeys(days))
+    tasks = [(day, (part,)) for day in days for part in parts_of(day)]
+    # Longest expected first, so the slowest days don't end up at the tail
+    tasks.sort(key=lambda task: expected_time(*task, timings), reverse=True)
+    pending = {day: len(parts_of(day)) for day in days}
+    partial = {day: [] for day in days}
+    done = {}
+    next_idx = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                run_parts,
+                day,
+                input_path(day, data_dir),
+                parts,
+                parse_cache_dir,
+                measure_memory,
+                answer_cache_dir,
+                count,
+            )
+            for day, parts in tasks
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            day = result["day"]
+            partial[day].append(result)
+            pending[day] -= 1
+            if pending[day] == 0:
+                done[day] = merge_results(partial[day])
+            # Report in day order, as soon as all previous days are done
+            while next_idx < len(days) and days[next_idx] in done:
+                on_day_done(done[days[next_idx]])
+                next_idx += 1
+    return [done[day] for day in days]
+
+
+def run_serial(
+    days: list[int],
+    data_dir: os.PathLike,
+    on_day_done: Callable[[dict], None],
+    parse_cache_dir: os.PathLike | None = None,
+    measure_memory: bool = False,
+    answer_cache_dir: os.PathLike | None = None,
+    count: bool = False,
+) -> list[dict]:
+    results = []
+    for day in days:
+        result = run_day(
+            day,
+            input_path(day, data_dir),
+            parse_cache_dir,
+            measure_memory,
+            answer_cache_dir,
+            count,
+        )
+        on_day_done(result)
+        results.append(result)
+    return results
+
+
+def total_time(result: dict) -> float:
+    return sum(t for t in result["timings"].values() if t is not None)
+
+
+def format_ms(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:.1f} ms"
+
+
+def print_answers(result: dict) -> None:
+    for part, answer in result["answers"].items():
+        print(f"Day {result['day']}, Part {part}: {answer}", flush=True)
+
+
+def print_timings(results: list[dict], wall_time: float) -> None:
+    print()
+    print(f"{'Day':>3}  {'Parse':>12}  {'Part 1':>12}  {'Part 2':>12}  {'Total':>12}")
+    for result in results:
+        timings = result["timings"]
+        print(
+            f"{result['day']:>3}  {format_ms(timings['parse']):>12}"
+            f"  {format_ms(timings['part1']):>12}"
+            f"  {format_ms(timings.get('part2')):>12}"
+            f"  {format_ms(total_time(result)):>12}"
+        )
+    overall = sum(total_time(result) for result in results)
+    print(f"{'All':>3}  {'':>12}  {'':>12}  {'':>12}  {format_ms(overall):>12}")
+    print(f"Wall time: {format_ms(wall_time)}")
+
+
+def print_memory(results: list[dict]) -> None:
+    print()
+    print(
+        f"{'Day':>3}  {'Step':<6}  {'Peak':>12}  {'Peak RSS':>12}  Top allocation sites"
+    )
+    for result in results:
+        for step, usage in result["memory"].items():
+            print(
+                f"{result['day']:>3}  {step:<6}  {memory.format_size(usage['peak']):>12}"
+                f"  {memory.format_size(usage['rss_peak']):>12}"
+            )
+            for site in usage["top"]:
+                print(
+                    f"{'':>3}  {'':<6}  {memory.format_size(site['size']):>12}"
+                    f"  {site['count']:>12}  {site['site']}"
+                )
+
+
+def print_counters(results: list[dict]) -> None:
+    print()
+    print(f"{'Day':>3}  {'Step':<6}  {'Count':>12}  Counter")
+    for result in results:
+        for step, counts in result["counters"].items():
+            for counter, value in counts.items():
+                print(f"{result['day']:>3}  {step:<6}  {value:>12}  {counter}")
+
+
+def print_json(results: list[dict], wall_time: float) -> None:
+    output = {
+        "days": results,
+        "total": sum(total_time(result) for result in results),
+        "wall_time": wall_time,
+    }
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, nargs="+", default=list(DAYS))
+    parser.add_argument("--data-dir", type=str, default=DATA_DIR)
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    parser.add_argument("--parallel", action="store_true")
+    parser.add_argument("--jobs", type=int, default=None)
+    parser.add_argument("--timings", type=str, default=TIMINGS_FILE)
+    # Store parsed inputs in (and load them from) a cache directory
+    parser.add_argument(
+        "--parse-cache", type=str, nargs="?", const=parse_cache.CACHE_DIR
+    )
+    # Report the peak memory and top allocation sites of every step. Tracing
+    # the allocations slows the solutions down, so no timings are recorded.
+    parser.add_argument("--memory", action="store_true")
+    # Report the counters of the solutions (see counters.py) for every step.
+    # Counting slows the counted functions down, so no timings are recorded.
+    parser.add_argument("--counters", action="store_true")
+    # Answers are cached unless disabled, e.g. to measure the solutions
+    parser.add_argument("--no-answer-cache", action="store_true")
+    parser.add_argument("--answer-cache", type=str, default=answer_cache.CACHE_DIR)
+    args = parser.parse_args()
+    # Days given more than once run once, like in the parallel mode
+    args.days = list(dict.fromkeys(args.days))
+    answer_cache_dir = args.answer_cache
+    # Steps answered from the cache don't run, so there's nothing to measure
+    if args.no_answer_cache or args.memory or args.counters:
+        answer_cache_dir = None
+    on_day_done = print_answers if args.format == "text" else lambda result: None
+    start = time.perf_counter()
+    if args.parallel:
+        timings = read_timings(args.timings)
+        results = run_parallel(
+            args.days,
+            args.data_dir,
+            timings,
+            args.jobs,
+            on_day_done,
+            args.parse_cache,
+            args.memory,
+            answer_cache_dir,
+            args.counters,
+        )
+    else:
+        results = run_serial(
+            args.days,
+            args.data_dir,
+            on_day_done,
+            args.parse_cache,
+            args.memory,
+            answer_cache_dir,
+            args.counters,
+        )
+    wall_time = time.perf_counter() - start
+    if not (args.memory or args.counters):
+        write_timings(args.timings, results)
+    if args.format == "json":
+        print_json(results, wall_time)
+    else:
+        print_timings(results, wall_time)
+        if args.memory:
+            print_memory(results)
+        if args.counters:
+            print_counters(results)
@@ -0,0 +1,212 @@
+import collections
+import heapq
+from array import array
+from typing import Callable, Iterable, NamedTuple
+
+import counters
+
+# Distance of nodes that weren't reached. It's larger than any real distance,
+# so comparisons like `dist + step < distance[node]` work without extra checks.
+UNREACHED = 1 << 62
+
+# Largest edge weight for which bucket queues (Dial's algorithm) are used
+MAX_BUCKET_WEIGHT = 4096
+
+type Edges = Callable[[int], Iterable[tuple[int, int]]]
+
+
+class ShortestPaths(NamedTuple):
+    algorithm: str
+    # Indexed by node ID
+    distance: array
+    # For each node, all predecessors on shortest paths (only if requested)
+    predecessors: list[list[int]] | None
+
+
+def choose_algorithm(weights: Iterable[int]) -> str:
+    weights = set(weights)
+    if any(w < 0 for w in weights):
+        raise ValueError("Negative edge weights are not supported")
+    if weights == {1}:
+        return "bfs"
+    if weights <= {0, 1}:
+        return "0-1 bfs"
+    if all(isinstance(w, int) for w in weights) and max(weights) <= MAX_BUCKET_WEIGHT:
+        return "dial"
+    return "dijkstra"
+
+
+def search(
+    node_count: int,
+    sources: Iterable[int],
+    edges: Edges,
+    weights: Iterable[int],
+    targets: Iterable[int] = (),
+    predecessors: bool = False,
+) -> ShortestPaths:
+    # Single or multi source shortest paths over nodes 0..node_count-1.
+    # `edges(node)` yields (neighbor, weight) pairs and `weights` are all
+    # weights that can occur, which determine the algorithm. The search stops
+    # once the nearest target and all nodes at the same distance are settled,
+    # so that the predecessors of equally near targets are complete.
+    weights = set(weights)
+    algorithm = choose_algorithm(weights)
+    distance = array("q", [UNREACHED]) * node_count
+    preds = [[] for _ in range(node_count)] if predecessors else None
+    sources = list(sources)
+    for source in sources:
+        distance[source] = 0
+    targets = set(targets)
+    # Every node is expanded once when it's popped from the queue (outdated
+    # entries are skipped without counting). Pushes are counted by _relax.
+    edges = counters.calls(edges, "search pops")
+    counters.add("search pushes", len(sources))
+    match algorithm:
+        case "bfs":
+            _bfs(sources, edges, distance, preds, targets)
+        case "0-1 bfs":
+            _zero_one_bfs(sources, edges, distance, preds, targets)
+        case "dial":
+            _dial(sources, edges, distance, preds, targets, max(weights))
+        case "dijkstra":
+            _dijkstra(sources, edges, distance, preds, targets)
+    return ShortestPaths(algorithm, distance, preds)
+
+
+@counters.counted("search pushes", only_true=True)
+def _relax(
+    node: int,
+    neighbor: int,
+    new_dist: int,
+    distance: array,
+    preds: list[list[int]] | None,
+) -> bool:
+    # Returns whether the neighbor's distance improved, then it's queued
+    if new_dist < distance[neighbor]:
+        distance[neighbor] = new_dist
+        if preds is not None:
+            preds[neighbor] = [node]
+        return True
+    if preds is not None and new_dist == distance[neighbor]:
+        preds[neighbor].append(node)
+    return False
+
+
+def _bfs(
+    sources: list[int],
+    edges: Edges,
+    distance: array,
+    preds: list[list[int]] | None,
+    targets: set[int],
+) -> None:
+    frontier = sources
+    dist = 0
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            for neighbor, _ in edges(node):
+                if _relax(node, neighbor, dist + 1, distance, preds):
+                    next_frontier.append(neighbor)
+        # The whole level is done, so all targets at this distance are settled
+        if not targets.isdisjoint(frontier):
+            break
+        frontier = next_frontier
+        dist += 1
+
+
+def _zero_one_bfs(
+    sources: list[int],
+    edges: Edges,
+    distance: array,
+    preds: list[list[int]] | None,
+    targets: set[int],
+) -> None:
+    frontier = collections.deque((0, source) for source in sources)
+    stop_at = UNREACHED
+    while frontier:
+        dist, node = frontier.popleft()
+        if dist > stop_at:
+            break
+        if dist > distance[node]:
+            # Outdated entry
+            continue
+        if node in targets:
+            stop_at = dist
+        for neighbor, weight in edges(node):
+            if _relax(node, neighbor, dist + weight, distance, preds):
+                if weight == 0:
+                    frontier.appendleft((dist, neighbor))
+                else:
+                    frontier.append((dist + 1, neighbor))
+
+
+def _dial(
+    sources: list[int],
+    edges: Edges,
+    distance: array,
+    preds: list[list[int]] | None,
+    targets: set[int],
+    max_weight: int,
+) -> None:
+    # Circular array of buckets, one per distance. All queued distances are
+    # within max_weight of the current one, so they never share a bucket.
+    bucket_count = max_weight + 1
+    buckets = [[] for _ in range(bucket_count)]
+    buckets[0].extend(sources)
+    queued = len(sources)
+    stop_at = UNREACHED
+    dist = 0
+    while queued and dist <= stop_at:
+        bucket = buckets[dist % bucket_count]
+        while bucket:
+            node = bucket.pop()
+            queued -= 1
+            if distance[node] != dist:
+                # Outdated entry
+                continue
+            if node in targets:
+                stop_at = dist
+            for neighbor, weight in edges(node):
+                new_dist = dist + weight
+                if _relax(node, neighbor, new_dist, distance, preds):
+                    buckets[new_dist % bucket_count].append(neighbor)
+                    queued += 1
+        dist += 1
+
+
+def _dijkstra(
+    sources: list[int],
+    edges: Edges,
+    distance: array,
+    preds: list[list[int]] | None,
+    targets: set[int],
+) -> None:
+    frontier = [(0, source) for source in sources]
+    heapq.heapify(frontier)
+    stop_at = UNREACHED
+    while frontier:
+        dist, node = heapq.heappop(frontier)
+        if dist > stop_at:
+            break
+        if dist > distance[node]:
+            # Outdated entry
+            continue
+        if node in targets:
+            stop_at = dist
+        for neighbor, weight in edges(node):
+            new_dist = dist + weight
+            if _relax(node, neighbor, new_dist, distance, preds):
+                heapq.heappush(frontier, (new_dist, neighbor))
+
+
+def grid_edges(
+    cells: Iterable[int], steps: Iterable[int], is_open: Callable[[int], bool]
+) -> Edges:
+    # Unit weight edges between open cells of a flat grid (see grid.Grid)
+    steps = tuple(steps)
+    open_cells = bytearray(is_open(value) for value in cells)
+
+    def edges(node: int) -> list[tuple[int, int]]:
+        return [(node + step, 1) for step in steps if open_cells[node + step]]
+
+    return edges
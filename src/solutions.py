@@ -0,0 +1,45 @@
+import importlib.util
+import re
+import sys
+import types
+from pathlib import Path
+
+# The solutions as modules, e.g. `from solutions import day_06` or
+# solutions.load(6), since the day-NN.py files can't be imported by name.
+#
+# Every solution has parse(source), part1(state) and part2(state) (except day
+# 25, which has only one part). The source is an input file, or "-" for
+# standard input. The parts don't modify the parsed state, so it can be shared
+# by both of them and reused. Days that compute both answers together also
+# have solve(state), which returns both. Days that keep tables at module level,
+# shared by all inputs, have clear_tables(), e.g. to measure them cold.
+
+SRC_DIR = Path(__file__).resolve().parent
+
+MODULE_NAME = re.compile(r"day_(\d\d)")
+
+
+def load(day: int) -> types.ModuleType:
+    # Imported once, as day_NN
+    name = f"day_{day:02}"
+    if name in sys.modules:
+        return sys.modules[name]
+    path = SRC_DIR / f"day-{day:02}.py"
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def clear_tables(day: int) -> None:
+    module = load(day)
+    if hasattr(module, "clear_tables"):
+        module.clear_tables()
+
+
+def __getattr__(name: str) -> types.ModuleType:
+    if (match := MODULE_NAME.fullmatch(name)) is not None:
+        if (SRC_DIR / f"day-{match[1]}.py").exists():
+            return load(int(match[1]))
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,47 @@
+import importlib
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import parse_cache
+
+# A day module that uses a local module only through another one
+MODULES = {
+    "hash_day": "import hash_reader\n",
+    "hash_reader": "import hash_stream\n",
+    "hash_stream": "CHUNK_SIZE = 1\n",
+}
+
+
+class SourceHashTest(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.src_dir = Path(tmp_dir.name).resolve()
+        for name, source in MODULES.items():
+            (self.src_dir / f"{name}.py").write_text(source)
+        sys.path.insert(0, str(self.src_dir))
+        self.addCleanup(sys.path.remove, str(self.src_dir))
+        for name in MODULES:
+            self.addCleanup(sys.modules.pop, name, None)
+        self.module = importlib.import_module("hash_day")
+
+    def test_indirect_dependencies(self):
+        self.assertEqual(
+            parse_cache.local_dependencies(self.module),
+            {self.src_dir / f"{name}.py" for name in MODULES},
+        )
+
+    def test_changes_with_indirect_dependency(self):
+        before = parse_cache.source_hash(self.module)
+        (self.src_dir / "hash_stream.py").write_text("CHUNK_SIZE = 2\n")
+        # As in a new process
+        parse_cache.source_hash.cache_clear()
+        self.assertNotEqual(parse_cache.source_hash(self.module), before)
+
+
+if __name__ == "__main__":
+    unittest.main()